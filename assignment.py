@@ -0,0 +1,121 @@
+from functools import partial
+import numpy as np
+from fields import DistanceField, INF
+
+# --- Batch Task Assignment ---
+# All idle agents are matched to open tasks at once. Costs are true path
+# lengths read from BFS distance fields (one field per agent or per task,
+# whichever side is smaller). Small batches are solved exactly with the
+# Hungarian method; large ones fall back to a greedy pass over the pairs in
+# cost order. Unreachable pairs are never assigned.
+
+def path_lengths(gmap, source, cells, inbound=False):
+    # Path lengths from source to each flat cell (from each cell to source if
+    # inbound), INF where none. As with GridMap.astar a route may start on a
+    # blocked cell (a wall spawn steps off onto a free neighbour) but only
+    # ends on one if it never moves.
+    cells = np.asarray(cells, dtype=np.int64)
+    s = gmap.index(source)
+    blocked = gmap.grid.reshape(-1) != 0
+    out = np.full(len(cells), INF, dtype=np.int64)
+    if not blocked[s]:
+        dist = DistanceField(gmap, [source]).dist
+        out[:] = dist[cells]
+        stuck = np.flatnonzero(blocked[cells]) if inbound else ()
+        if len(stuck):
+            nb = gmap.nbrs[cells[stuck]]
+            d = np.where(nb >= 0, dist[np.maximum(nb, 0)], INF).min(axis=1).astype(np.int64)
+            out[stuck] = np.where(d < INF, d + 1, INF)
+    elif not inbound:
+        nb = gmap.nbrs[s]
+        d = DistanceField(gmap, [gmap.cell(j) for j in nb[nb >= 0].tolist()]).dist[cells].astype(np.int64)
+        out[:] = np.where(d < INF, d + 1, INF)
+    out[cells == s] = 0
+    return out
+
+
+def cost_matrix(gmap, agents, tasks, rows=None):
+    # agents x tasks path lengths, INF where no path exists. rows(sources,
+    # cells, inbound) gives path_lengths() for each source; the default runs
+    # them in turn, planpool.PlanPool runs them on a process pool
+    a = np.fromiter((gmap.index(p) for p in agents), dtype=np.int64, count=len(agents))
+    t = np.fromiter((gmap.index(p) for p in tasks), dtype=np.int64, count=len(tasks))
+    rows = rows or partial(lengths_from, gmap)
+    if len(a) <= len(t):
+        return np.array(rows(agents, t, False), dtype=np.int64).reshape(len(a), len(t))
+    return np.array(rows(tasks, a, True), dtype=np.int64).reshape(len(t), len(a)).T
+
+
+def lengths_from(gmap, sources, cells, inbound=False):
+    return [path_lengths(gmap, p, cells, inbound) for p in sources]
+
+
+def hungarian(cost):
+    # Minimum-cost matching of every row of an n x m matrix (n <= m), using
+    # shortest augmenting paths with row/column potentials. Returns col per row.
+    n, m = cost.shape
+    u, v = np.zeros(n + 1), np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)    # p[j]: row matched to column j (1-based, 0 = free)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0], j0 = i, 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(masked.argmin()) + 1
+            delta = masked[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0: break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    col = np.empty(n, dtype=np.int64)
+    for j in range(1, m + 1):
+        if p[j]: col[p[j] - 1] = j - 1
+    return col
+
+
+def greedy(cost):
+    # Cheapest remaining pair first; returns col per row (-1 if none left)
+    n, m = cost.shape
+    col = np.full(n, -1, dtype=np.int64)
+    taken = np.zeros(m, dtype=bool)
+    left = n
+    for k in np.argsort(cost, axis=None, kind='stable'):
+        i, j = divmod(int(k), m)
+        if col[i] < 0 and not taken[j]:
+            col[i] = j; taken[j] = True
+            left -= 1
+            if not left: break
+    return col
+
+
+def assign(cost, max_exact=200):
+    # (agent, task) index pairs of a minimum-cost matching over finite costs
+    cost = np.asarray(cost)
+    n, m = cost.shape
+    if not n or not m: return []
+    finite = cost < INF
+    if not finite.any(): return []
+    # Unreachable pairs get a cost above any full matching of reachable ones
+    big = float(cost[finite].max()) * min(n, m) + 1
+    c = np.where(finite, cost, big).astype(float)
+    if max(n, m) > max_exact: col = greedy(c)
+    elif n <= m: col = hungarian(c)
+    else:
+        row = hungarian(c.T)
+        col = np.full(n, -1, dtype=np.int64)
+        col[row] = np.arange(m)
+    return [(i, int(j)) for i, j in enumerate(col) if j >= 0 and finite[i, j]]
@@ -0,0 +1,168 @@
+import argparse
+import importlib
+import json
+import platform
+import random
+import sys
+import time
+import numpy as np
+from assignment import assign, cost_matrix
+from fields import DistanceField
+from pathfinding import SEARCHES, GridMap
+from population import AgentPopulation
+from spatial import SpatialIndex
+from world import make_grid
+
+# --- Benchmarks ---
+# Fixed-seed timings of the hot paths: grid searches and distance fields over
+# a range of map sizes and wall densities, target selection, the per-tick
+# agent step and fire spread, and a whole episode of every scenario. Each
+# case is timed `repeat` times and keeps the best run, and reports seconds
+# plus a throughput figure (nodes expanded/s, steps/s, ...).
+#
+#   python bench.py --save baseline.json       # record a baseline
+#   python bench.py --compare baseline.json    # flag cases that got slower
+#
+# Compare mode exits with status 1 when a case is slower than the baseline by
+# more than --tolerance, so it can gate a change.
+
+SIZES = (32, 128, 512)
+DENSITIES = (0.05, 0.2)
+SCENARIOS = ('maze1', 'crew2', 'path3', 'warehouse4', 'rescue5',
+             'drone6', 'grid7', 'resource8', 'fire9', 'map10')
+
+
+def _best(fn, repeat):
+    # (best seconds, last return value)
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def _free_cells(grid, rng, k):
+    free = np.argwhere(grid == 0)
+    return [tuple(int(v) for v in free[i]) for i in rng.choice(len(free), k)]
+
+
+def bench_search(cases, repeat, sizes):
+    for n in sizes:
+        for d in DENSITIES:
+            grid = make_grid(random.Random(1), n, n, d)
+            gmap = GridMap(grid)
+            rng = np.random.default_rng(2)
+            k = max(4, 6400 // n)  # fewer, longer routes on bigger maps
+            starts, goals = _free_cells(grid, rng, k), _free_cells(grid, rng, k)
+            for method in SEARCHES + ('bfs',):
+                def go():
+                    expanded = 0
+                    for s, t in zip(starts, goals):
+                        if method == 'bfs': gmap.bfs(s, [t])
+                        else: gmap.search(s, t, method)
+                        expanded += gmap.expanded
+                    return expanded
+                sec, expanded = _best(go, repeat)
+                cases[f"search/{method}/{n}/{d}"] = {'seconds': sec, 'rate': expanded / sec, 'unit': 'nodes/s'}
+            few = goals[:8]
+            sec, _ = _best(lambda: [DistanceField(gmap, [g]) for g in few], repeat)
+            cases[f"field/{n}/{d}"] = {'seconds': sec, 'rate': len(few) * gmap.n / sec, 'unit': 'cells/s'}
+
+
+def bench_targets(cases, repeat):
+    grid = make_grid(random.Random(3), 128, 128, 0.05)
+    gmap = GridMap(grid)
+    rng = np.random.default_rng(4)
+    for n_agents, n_tasks in ((10, 50), (50, 200)):
+        agents, tasks = _free_cells(grid, rng, n_agents), _free_cells(grid, rng, n_tasks)
+        sec, _ = _best(lambda: assign(cost_matrix(gmap, agents, tasks)), repeat)
+        cases[f"assign/{n_agents}x{n_tasks}"] = {'seconds': sec, 'rate': n_agents * n_tasks / sec, 'unit': 'pairs/s'}
+    items = _free_cells(grid, rng, 2000)
+    queries = _free_cells(grid, rng, 2000)
+    index = SpatialIndex(128, 128, items)
+    sec, _ = _best(lambda: [index.nearest(q) for q in queries], repeat)
+    cases["nearest/2000"] = {'seconds': sec, 'rate': len(queries) / sec, 'unit': 'queries/s'}
+
+
+def bench_tick(cases, repeat):
+    import fire9
+    grid = make_grid(random.Random(5), 256, 256, 0.05)
+    gmap = GridMap(grid)
+    rng = np.random.default_rng(6)
+    starts = _free_cells(grid, rng, 5000)
+    goals = _free_cells(grid, rng, 5000)
+    pop = AgentPopulation(gmap, starts)
+    for i, (s, t) in enumerate(zip(starts, goals)):
+        path = gmap.jps(s, t)
+        if path: pop.set_path(i, path)
+    cur = pop.cur.copy()
+    ticks = 50
+    def go():
+        pop.cur[:] = cur
+        for _ in range(ticks): pop.step()
+    sec, _ = _best(go, repeat)
+    cases["tick/population/5000"] = {'seconds': sec, 'rate': ticks * len(starts) / sec, 'unit': 'agent-steps/s'}
+
+    lit = rng.random(gmap.n) < 0.1
+    def spread():
+        burning = lit.copy()
+        nrng = np.random.default_rng(7)
+        for _ in range(ticks): fire9.spread(gmap, burning, 0.05, nrng)
+    sec, _ = _best(spread, repeat)
+    cases["tick/fire9/256"] = {'seconds': sec, 'rate': ticks * gmap.n / sec, 'unit': 'cells/s'}
+
+
+def bench_episodes(cases, repeat):
+    for name in SCENARIOS:
+        module = importlib.import_module(name)
+        sec, result = _best(module.run, repeat)
+        cases[f"episode/{name}"] = {'seconds': sec, 'rate': result['steps'] / sec, 'unit': 'steps/s'}
+
+
+def run(repeat=3, sizes=SIZES, only=None):
+    cases = {}
+    groups = {'search': lambda: bench_search(cases, repeat, sizes), 'targets': lambda: bench_targets(cases, repeat),
+              'tick': lambda: bench_tick(cases, repeat), 'episode': lambda: bench_episodes(cases, repeat)}
+    for name, fn in groups.items():
+        if only is None or name in only: fn()
+    meta = {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'repeat': repeat}
+    return {'meta': meta, 'cases': cases}
+
+
+def compare(old, new, tolerance=0.2):
+    # (name, old seconds, new seconds, ratio, slower?) for cases in both runs
+    rows = []
+    for name, case in new['cases'].items():
+        base = old['cases'].get(name)
+        if base is None: continue
+        ratio = case['seconds'] / base['seconds']
+        rows.append((name, base['seconds'], case['seconds'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="Time the hot paths and whole episodes")
+    ap.add_argument('--repeat', type=int, default=3, help="runs per case; the best is kept")
+    ap.add_argument('--sizes', default=','.join(map(str, SIZES)), help="map sizes for the search cases")
+    ap.add_argument('--only', help="comma list of groups: search, targets, tick, episode")
+    ap.add_argument('--save', help="write the results as JSON")
+    ap.add_argument('--compare', help="baseline JSON to compare against")
+    ap.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    args = ap.parse_args()
+
+    sizes = tuple(int(s) for s in args.sizes.split(','))
+    result = run(args.repeat, sizes, args.only and args.only.split(','))
+    for name, case in result['cases'].items():
+        print(f"{name:32s} {case['seconds'] * 1000:10.2f} ms  {case['rate']:14,.0f} {case['unit']}")
+    if args.save:
+        with open(args.save, 'w') as f: json.dump(result, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f: old = json.load(f)
+        rows = compare(old, result, args.tolerance)
+        print(f"\nagainst {args.compare}:")
+        for name, a, b, ratio, slower in rows:
+            print(f"{name:32s} {a * 1000:10.2f} -> {b * 1000:10.2f} ms  x{ratio:5.2f}{'  SLOWER' if slower else ''}")
+        if any(r[4] for r in rows):
+            sys.exit(1)
@@ -0,0 +1,116 @@
+import math
+from array import array
+import numpy as np
+from pathfinding import Path
+
+# --- Boustrophedon Coverage ---
+# The floor is cut into vertical bands of `b` columns. A route sweeps the bands
+# one after another, snaking row by row through each band's targets and
+# entering every band at the end nearer to where the last one finished. For
+# target density p a band costs about 1/(p*b) vertical plus (b*b - 1)/(3*b)
+# sideways moves per target, which is smallest near b = sqrt(3/p - 1).
+#
+# Consecutive targets are joined by an L-shaped walk whenever one of the two
+# L's is obstacle-free (checked in O(1) with prefix sums of blocked cells);
+# only the rest need a search (JPS). `searches` counts those.
+#
+# split='columns' gives agent i the i-th vertical strip of the map (crew2);
+# split='parity' gives agent i the targets with (r + c) % n == i (grid7).
+
+def band_width(n_targets, n_free):
+    if not n_targets: return 1
+    return max(1, math.ceil(math.sqrt(max(3 * n_free / n_targets - 1, 0))))
+
+
+def sweep_order(targets, b, start, lo=0):
+    # Visit order of targets: bands [lo + j*b, lo + (j+1)*b) left to right
+    bands = {}
+    for r, c in targets: bands.setdefault((c - lo) // b, []).append((r, c))
+    pts, r = [], start[0]
+    for j in sorted(bands):
+        band = sorted(bands[j])
+        if abs(r - band[-1][0]) < abs(r - band[0][0]): band.reverse()
+        # Alternate the sideways direction from one row to the next
+        rows, flip = [], False
+        for p in band:
+            if rows and rows[-1][-1][0] == p[0]: rows[-1].append(p)
+            else: rows.append([p])
+        for row in rows:
+            if flip: row.reverse()
+            pts.extend(row)
+            flip = not flip
+        r = band[-1][0]
+    return pts
+
+
+class CoveragePlanner:
+    def __init__(self, gmap):
+        self.gmap = gmap
+        self.searches = 0
+        blocked = (gmap.grid != 0).astype(np.int32)
+        # _row[r, c] / _col[r, c]: blocked cells before column c / row r
+        self._row = np.pad(blocked.cumsum(axis=1), ((0, 0), (1, 0)))
+        self._col = np.pad(blocked.cumsum(axis=0), ((1, 0), (0, 0)))
+
+    def plan(self, starts, targets, split='columns'):
+        n, W = len(starts), self.gmap.W
+        targets = list(targets)
+        routes = []
+        for i, start in enumerate(starts):
+            if split == 'columns':
+                lo, hi = W * i // n, W * (i + 1) // n
+                mine = [p for p in targets if lo <= p[1] < hi]
+                n_free = int((self.gmap.grid[:, lo:hi] == 0).sum())
+            elif split == 'parity':
+                lo = 0
+                mine = [p for p in targets if (p[0] + p[1]) % n == i]
+                n_free = int((self.gmap.grid == 0).sum()) // n
+            else:
+                raise ValueError(f"unknown split {split!r}")
+            routes.append(self.route(start, sweep_order(mine, band_width(len(mine), n_free), start, lo)))
+        return routes
+
+    def sweep(self, start, targets):
+        # Route over targets anywhere on the map, bands chosen from their density
+        targets = list(targets)
+        b = band_width(len(targets), int((self.gmap.grid == 0).sum()))
+        return self.route(start, sweep_order(targets, b, start))
+
+    def route(self, start, pts):
+        # Path from start through pts in order (unreachable ones are skipped)
+        gmap = self.gmap
+        out = array('i', [gmap.index(start)])
+        pos = start
+        for p in pts:
+            walk = self._walk(pos, p)
+            if walk is None:
+                self.searches += 1
+                hop = gmap.jps(pos, p)
+                if hop is None: continue
+                walk = hop.cells[1:]
+            out.extend(walk)
+            pos = p
+        return Path(out, gmap.W) if len(out) > 1 else None
+
+    def _clear_row(self, r, c0, c1):
+        lo, hi = min(c0, c1), max(c0, c1)
+        return self._row[r, hi + 1] == self._row[r, lo]
+
+    def _clear_col(self, c, r0, r1):
+        lo, hi = min(r0, r1), max(r0, r1)
+        return self._col[hi + 1, c] == self._col[lo, c]
+
+    def _walk(self, a, b):
+        # Flat cells after a up to b along a free L (None if both are blocked)
+        (r0, c0), (r1, c1) = a, b
+        W = self.gmap.W
+        if self._clear_row(r0, c0, c1) and self._clear_col(c1, r0, r1): corner = (r0, c1)
+        elif self._clear_col(c0, r0, r1) and self._clear_row(r1, c0, c1): corner = (r1, c0)
+        else: return None
+        out = []
+        (r, c) = a
+        for tr, tc in (corner, b):
+            while (r, c) != (tr, tc):
+                r += (tr > r) - (tr < r); c += (tc > c) - (tc < c)
+                out.append(r * W + c)
+        return out
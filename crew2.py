@@ -1,110 +1,84 @@
-import numpy as np
-import heapq
 import random
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-
-# --- A* Logic ---
-def astar(start, goal, H, W, grid):
-    def h(a, b): return abs(a[0]-b[0]) + abs(a[1]-b[1])
-    open_set = [(h(start, goal), 0, start, None)]
-    came_from = {}
-    g_score = {start: 0}
-    
-    while open_set:
-        _, dist, cur, parent = heapq.heappop(open_set)
-        if cur in came_from and g_score.get(cur, float('inf')) < dist: continue
-        came_from[cur] = parent
-        
-        if cur == goal:
-            path = []
-            while cur:
-                path.append(cur)
-                cur = came_from[cur]
-            return path[::-1]
-            
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr, nc] == 0:
-                new_g = dist + 1
-                if new_g < g_score.get((nr, nc), float('inf')):
-                    g_score[(nr, nc)] = new_g
-                    heapq.heappush(open_set, (new_g + h((nr, nc), goal), new_g, (nr, nc), cur))
-    return None
-
-# --- Setup ---
-H, W = 12, 12
-grid = np.zeros((H, W), dtype=int)
-random.seed(7)
-# Add random walls
-for r in range(H):
-    for c in range(W):
-        if random.random() < 0.1: grid[r, c] = 1
-
-# Create Dirt
-dirty_cells = set()
-for r in range(H):
-    for c in range(W):
-        if grid[r, c] == 0 and random.random() < 0.3:
-            dirty_cells.add((r, c))
-
-agents = [
-    {'id': 0, 'pos': (0, 0), 'path': [], 'color': '#FF5722'}, # Deep Orange
-    {'id': 1, 'pos': (H-1, W-1), 'path': [], 'color': '#00BCD4'} # Cyan
-]
+import numpy as np
+from boustrophedon import CoveragePlanner
+from episodelog import EpisodeWriter
+from pathfinding import GridMap
+from recorder import FrameRecorder
+from world import make_grid, spawn
+
+COLORS = ['#FF5722', '#00BCD4'] # Deep Orange, Cyan
 
 # --- Simulation ---
-history_frames = []
-max_steps = 400
-
-for step in range(max_steps):
-    if not dirty_cells: break
-
-    for i, ag in enumerate(agents):
-        # Logic: Agent 0 cleans left side, Agent 1 cleans right side (optimization)
-        my_region = [(r,c) for r,c in dirty_cells if (c < W//2 if i==0 else c >= W//2)]
-        # If my side is clean, help the other side
-        targets = my_region if my_region else list(dirty_cells)
-        
-        if not ag['path'] and targets:
-            target = min(targets, key=lambda x: abs(x[0]-ag['pos'][0]) + abs(x[1]-ag['pos'][1]))
-            path = astar(ag['pos'], target, H, W, grid)
-            if path: ag['path'] = path
-        
-        if ag['path']:
-            if len(ag['path']) > 1:
-                ag['path'].pop(0)
-                ag['pos'] = ag['path'][0]
-            elif len(ag['path']) == 1:
-                 ag['pos'] = ag['path'][0] # Reached end
+def run(seed=7, H=12, W=12, n_agents=2, dirt_p=0.3, density=0.1, max_steps=400, log=None):
+    rng = random.Random(seed)
+    # Add random walls
+    grid = make_grid(rng, H, W, density)
+    gmap = GridMap(grid)
+
+    # Create Dirt
+    dirty_cells = set()
+    for r in range(H):
+        for c in range(W):
+            if grid[r, c] == 0 and rng.random() < dirt_p:
+                dirty_cells.add((r, c))
+
+    starts = spawn(rng, grid, n_agents, [(0, 0), (H-1, W-1)])
+    agents = [{'id': i, 'pos': s, 'path': None, 'color': COLORS[i % len(COLORS)]} for i, s in enumerate(starts)]
+    # Each agent sweeps a vertical band of columns (left/right halves for two agents)
+    planner = CoveragePlanner(gmap)
+    for ag, route in zip(agents, planner.plan(starts, dirty_cells, split='columns')): ag['path'] = route
+
+    history_frames = FrameRecorder(starts, sink=EpisodeWriter(log, grid) if log else None, dirt=dirty_cells)
 
+    def clean(ag):
         if ag['pos'] in dirty_cells:
             dirty_cells.remove(ag['pos'])
+            history_frames.remove('dirt', ag['pos'])
 
-    history_frames.append({'agents': [dict(a) for a in agents], 'dirt': list(dirty_cells)})
+    for ag in agents: clean(ag) # An agent may start on a dirty cell
+
+    for step in range(max_steps):
+        if not dirty_cells: break
+
+        for i, ag in enumerate(agents):
+            # If my side is clean, help with whatever dirt is left anywhere
+            if ag['path'] is None and dirty_cells:
+                ag['path'] = planner.sweep(ag['pos'], dirty_cells) or False
+
+            if ag['path']:
+                ag['pos'] = ag['path'].advance()
+                if not ag['path'].remaining(): ag['path'] = None # Reached end
+            clean(ag)
+
+        history_frames.commit([a['pos'] for a in agents])
+        # Whatever dirt is left cannot be reached
+        if all(a['path'] is False for a in agents): break
+
+    history_frames.close()
+    return {'grid': grid, 'frames': history_frames, 'colors': [a['color'] for a in agents],
+            'steps': len(history_frames), 'remaining': len(dirty_cells), 'searches': planner.searches}
 
 # --- Render ---
-print(f"Cleaning finished. Frames: {len(history_frames)}")
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('#212121') 
-
-def update(frame_idx):
-    ax.clear(); ax.axis('off')
-    data = history_frames[frame_idx]
-    
+def animate(result):
+    from render import Board, xy
+
+    grid, history_frames, colors = result['grid'], result['frames'], result['colors']
+    H, W = grid.shape
     floor = np.zeros((H, W, 3)) + 0.2
-    floor[grid == 1] = [0.1, 0.1, 0.1] 
-    ax.imshow(floor, extent=[0, W, H, 0])
-    
-    if data['dirt']:
-        dy, dx = zip(*data['dirt'])
-        ax.scatter(dx, dy, c='#795548', s=120, marker='o', alpha=0.8, edgecolors='none')
+    floor[grid == 1] = [0.1, 0.1, 0.1]
+    board = Board(floor, '#212121', fontsize=10)
+    dirt = board.points(c='#795548', s=120, marker='o', alpha=0.8, edgecolors='none')
+    agents = board.points(history_frames.positions(0), c=colors, s=220, edgecolors='white', linewidth=2)
 
-    for ag in data['agents']:
-        ax.scatter(ag['pos'][1], ag['pos'][0], c=ag['color'], s=220, edgecolors='white', linewidth=2)
+    def update(frame_idx):
+        data = history_frames[frame_idx]
+        dirt.set_offsets(xy(data['dirt']))
+        agents.set_offsets(xy(data['agents']))
+        board.title.set_text(f"CLEANING CREW | Dirt Left: {len(data['dirt'])}")
 
-    ax.set_title(f"CLEANING CREW | Dirt Left: {len(data['dirt'])}", fontsize=10, color='white')
-    ax.set_xlim(-0.5, W-0.5); ax.set_ylim(H-0.5, -0.5)
+    return board.play(update, len(history_frames), interval=50)
 
-anim = FuncAnimation(fig, update, frames=len(history_frames), interval=50, repeat=False)
-plt.show()
\ No newline at end of file
+if __name__ == '__main__':
+    result = run()
+    print(f"Cleaning finished. Frames: {len(result['frames'])}")
+    animate(result)
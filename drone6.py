@@ -1,86 +1,79 @@
-import numpy as np
 import random
-import heapq
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import numpy as np
+from episodelog import EpisodeWriter
+from pathfinding import GridMap
+from population import AgentPopulation
+from recorder import FrameRecorder
+from sequencing import TourPlanner
+from world import make_grid, spawn
+
+COLORS = ['#2979FF', '#FF4081']
+
+def run(seed=99, H=16, W=16, n_agents=2, n_packages=6, density=0.04, max_steps=400, log=None):
+    rng = random.Random(seed)
+    grid = make_grid(rng, H, W, density)
+    gmap = GridMap(grid)
 
-def astar(start, goal, H, W, grid):
-    def h(a, b): return abs(a[0]-b[0]) + abs(a[1]-b[1])
-    open_set = [(h(start, goal), 0, start, None)]; came = {}; g = {start: 0}
-    while open_set:
-        _, dist, cur, parent = heapq.heappop(open_set)
-        if cur == goal:
-            path = []
-            while cur: path.append(cur); cur = came.get(cur)
-            return path[::-1]
-        if cur in came and g.get(cur,float('inf'))<dist: continue
-        came[cur] = parent
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0:
-                if dist+1 < g.get((nr,nc),float('inf')):
-                    g[(nr,nc)]=dist+1; heapq.heappush(open_set, (dist+1+h((nr,nc),goal), dist+1, (nr,nc), cur))
-    return None
+    starts = spawn(rng, grid, n_agents, [(1,1), (H-2,W-2)])
+    colors = [COLORS[i % len(COLORS)] for i in range(n_agents)]
+    drones = AgentPopulation(gmap, starts)
+    packages = set((rng.randint(1, H-2), rng.randint(1, W-2)) for _ in range(n_packages))
 
-H, W = 16, 16
-grid = np.zeros((H, W), dtype=int)
-random.seed(99)
-for r in range(H): 
-    for c in range(W): 
-        if random.random() < 0.04: grid[r, c] = 1
+    # Packages are shared out between drones up front; each drone flies its
+    # share as one sequenced tour and drops a package at every stop
+    tours = TourPlanner(gmap)
+    stops = []
+    for i, (mine, path) in enumerate(tours.plan(starts, sorted(packages))):
+        stops.append(set(mine))
+        if mine: drones.set_path(i, path)
 
-drones = [
-    {'pos':(1,1), 'path':[], 'task':None, 'color':'#2979FF'}, 
-    {'pos':(H-2,W-2), 'path':[], 'task':None, 'color':'#FF4081'}
-]
-packages = set((random.randint(1, H-2), random.randint(1, W-2)) for _ in range(6))
+    frames = FrameRecorder(starts, sink=EpisodeWriter(log, grid) if log else None, packs=packages)
 
-frames = []
-for _ in range(400):
-    if not packages and all(not d['task'] for d in drones): break
-    
-    for d in drones:
-        if not d['task'] and packages:
-            target = min(packages, key=lambda x: abs(x[0]-d['pos'][0])+abs(x[1]-d['pos'][1]))
-            d['task'] = target
-            packages.remove(target)
-            path = astar(d['pos'], target, H, W, grid)
-            if path: d['path'] = path
-        
-        if d['path']:
-            if len(d['path']) > 1: d['path'].pop(0); d['pos'] = d['path'][0]
-        
-        if d['pos'] == d['task']: d['task'] = None
+    def deliver(i):
+        p = drones.cell(i)
+        if p in stops[i]:
+            stops[i].remove(p); packages.remove(p); frames.remove('packs', p)
 
-    # Visualization data
-    active_tasks = [d['task'] for d in drones if d['task']]
-    frames.append({'drones': [d['pos'] for d in drones], 'packs': list(packages) + active_tasks})
+    for i in range(n_agents): deliver(i)
+    for _ in range(max_steps):
+        # Done once every tour is flown (anything left is unreachable)
+        if not drones.has_path.any(): break
 
-print(f"Delivery complete. Frames: {len(frames)}")
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('#0D47A1')
+        drones.step()
+        for i in np.flatnonzero(drones.has_path): deliver(i)
+        drones.clear(np.flatnonzero(drones.has_path & (drones.remaining() == 0)))
 
-def render(frame):
-    ax.clear(); ax.axis('off')
-    data = frames[frame]
-    
+        # Visualization data: packages stay on the map until delivered
+        frames.commit(drones.positions())
+
+    frames.close()
+    return {'grid': grid, 'frames': frames, 'colors': colors,
+            'steps': len(frames), 'remaining': len(packages)}
+
+def animate(result):
+    from render import Board, xy
+
+    grid, frames, colors = result['grid'], result['frames'], result['colors']
+    H, W = grid.shape
     canvas = np.zeros((H, W, 3)) + 0.1
     canvas[grid==1] = [0, 0, 0.2]
-    ax.imshow(canvas, extent=[0, W, H, 0], alpha=0.6)
-    
-    for x in range(W): ax.axvline(x-0.5, color='white', alpha=0.1)
-    for y in range(H): ax.axhline(y-0.5, color='white', alpha=0.1)
-
-    if data['packs']:
-        py, px = zip(*[p for p in data['packs'] if p])
-        ax.scatter(px, py, c='#FFD740', marker='D', s=100, edgecolors='black')
+    board = Board(canvas, '#0D47A1', alpha=0.6)
+    board.gridlines(colors='white', alpha=0.1)
+    packs = board.points(c='#FFD740', marker='D', s=100, edgecolors='black')
+    start = frames.positions(0)
+    drones = board.points(start, c=colors, s=200, marker='o', edgecolors='white', linewidth=2)
+    rotors = board.points(start, c='white', s=50, marker='+')
 
-    for i, pos in enumerate(data['drones']):
-        ax.scatter(pos[1], pos[0], c=drones[i]['color'], s=200, marker='o', edgecolors='white', linewidth=2)
-        ax.scatter(pos[1], pos[0], c='white', s=50, marker='+')
+    def render(frame):
+        data = frames[frame]
+        packs.set_offsets(xy(data['packs']))
+        drones.set_offsets(xy(data['agents']))
+        rotors.set_offsets(xy(data['agents']))
+        board.title.set_text(f"DRONE DELIVERY | Step: {frame}")
 
-    ax.set_title(f"DRONE DELIVERY | Step: {frame}", color='white')
-    ax.set_xlim(-0.5, W-0.5); ax.set_ylim(H-0.5, -0.5)
+    return board.play(render, len(frames), interval=100)
 
-anim = FuncAnimation(fig, render, frames=len(frames), interval=100, repeat=False)
-plt.show()
\ No newline at end of file
+if __name__ == '__main__':
+    result = run()
+    print(f"Delivery complete. Frames: {len(result['frames'])}")
+    animate(result)
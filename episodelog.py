@@ -0,0 +1,270 @@
+import json
+import os
+import shutil
+import struct
+import sys
+from bisect import bisect_right
+from itertools import chain
+import numpy as np
+
+# --- Binary Episode Logs ---
+# One file per episode, written while the episode runs (as a FrameRecorder
+# sink) and read back through numpy.memmap, so a log of any length can be
+# scrubbed without loading it:
+#
+#   header   fixed fields (below), then JSON (layer names, start positions,
+#            info) and the grid as H*W uint8
+#   steps    agent positions, steps x agents x (r, c), int16 (int32 for
+#            maps wider than 32767), one record appended per commit
+#   events   layer changes, one record each: (step, layer, kind,
+#            value, r, c), sorted by step; step -1 holds the starting layers
+#   footer   JSON: the value table and frame meta wherever it changed
+#
+# Events go to a sidecar file (<path>.events) during the run and are moved
+# behind the steps by close(), which then fills in the header. A log whose
+# writer never closed still opens: steps are counted from the file size and
+# events read from the sidecar (meta and item values are lost).
+#
+# Items are (r, c) cells, or (cell, value) pairs such as grid7's painted
+# cells; values are numbered in the footer table and 0 means a plain cell.
+# EpisodeLog replays with the FrameRecorder playback API (positions, trail,
+# changes, layers, frames[i], travelled), so animate() and export.Painter
+# take either.
+
+MAGIC = b'AGENTLOG'
+VERSION = 1
+# magic, version, coord bytes, H, W, agents, JSON bytes, steps,
+# events offset, events, footer offset, footer bytes
+HEAD = struct.Struct('<8sHHIIIIQQQQQ')
+ADD, REMOVE = 1, 0
+CHUNK = 1 << 16  # steps per block in whole-log scans
+
+
+def _events(coord):
+    return np.dtype([('step', '<i4'), ('layer', 'u1'), ('kind', 'u1'), ('value', '<u2'),
+                     ('r', coord), ('c', coord)])
+
+
+def _coord(H, W):
+    return np.dtype('<i2') if max(H, W) <= 32767 else np.dtype('<i4')
+
+
+def _pad(f):
+    # Align the next write to 8 bytes
+    f.write(b'\0' * (-f.tell() % 8))
+
+
+class EpisodeWriter:
+    def __init__(self, path, grid, **info):
+        self.path = path
+        self.grid = np.ascontiguousarray(grid, dtype=np.uint8)
+        self.info = info
+        self.coord = _coord(*self.grid.shape)
+        self.event = _events(self.coord)
+        self.steps = 0
+        self.n_events = 0
+        self._values, self._value_id = [], {}
+        self._meta, self._last_meta = [], None
+        self._f = self._ev = None
+
+    # --- FrameRecorder sink ---
+    def start(self, agents, layers):
+        H, W = self.grid.shape
+        self.agents = len(agents)
+        self.layers = list(layers)
+        if len(self.layers) > 255: raise ValueError("at most 255 layers")
+        self._layer_id = {k: i for i, k in enumerate(self.layers)}
+        head = json.dumps({'layers': self.layers, 'start': [list(p) for p in agents], 'info': self.info}).encode()
+        self._head = (self.coord.itemsize, H, W, self.agents, len(head))
+        self._record = struct.Struct(f"<{2 * self.agents}{'h' if self.coord.itemsize == 2 else 'i'}")
+        self._f = open(self.path, 'wb')
+        self._f.write(HEAD.pack(MAGIC, VERSION, *self._head, 0, 0, 0, 0, 0))
+        self._f.write(head)
+        self._f.write(self.grid.tobytes())
+        _pad(self._f)
+        self._ev = open(self.path + '.events', 'wb')
+        self._write_events(-1, {k: (tuple(v), ()) for k, v in layers.items()})
+
+    def frame(self, agents, delta, meta):
+        self._f.write(self._record.pack(*chain.from_iterable(agents)))
+        if delta: self._write_events(self.steps, delta)
+        if meta != self._last_meta:
+            self._meta.append([self.steps, meta])
+            self._last_meta = meta
+        self.steps += 1
+
+    def _value(self, v):
+        key = json.dumps(v)
+        if key not in self._value_id:
+            if len(self._values) == 65535: raise ValueError("more than 65535 item values")
+            self._values.append(v)
+            self._value_id[key] = len(self._values)
+        return self._value_id[key]
+
+    def _write_events(self, step, delta):
+        rows = []
+        for name, (added, removed) in delta.items():
+            layer = self._layer_id[name]
+            for kind, items in ((REMOVE, removed), (ADD, added)):
+                for item in items:
+                    if isinstance(item[0], tuple): rows.append((step, layer, kind, self._value(item[1])) + item[0])
+                    else: rows.append((step, layer, kind, 0) + item)
+        if rows:
+            self._ev.write(np.array(rows, dtype=self.event).tobytes())
+            self.n_events += len(rows)
+
+    def close(self):
+        if self._f is None: return
+        f = self._f
+        self._ev.close()
+        _pad(f)
+        events_at = f.tell()
+        with open(self.path + '.events', 'rb') as ev: shutil.copyfileobj(ev, f)
+        footer = json.dumps({'values': self._values, 'meta': self._meta}).encode()
+        footer_at = f.tell()
+        f.write(footer)
+        f.seek(0)
+        f.write(HEAD.pack(MAGIC, VERSION, *self._head, self.steps, events_at, self.n_events, footer_at, len(footer)))
+        f.close()
+        os.remove(self.path + '.events')
+        self._f = None
+
+
+def _item(v):
+    return tuple(_item(x) for x in v) if isinstance(v, list) else v
+
+
+class EpisodeLog:
+    def __init__(self, path):
+        self.path = path
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            fields = HEAD.unpack(f.read(HEAD.size))
+            magic, version, cbytes, H, W, A, json_len, steps, events_at, n_events, footer_at, footer_len = fields
+            if magic != MAGIC: raise ValueError(f"{path} is not an episode log")
+            if version != VERSION: raise ValueError(f"{path} is log version {version}, this reads {VERSION}")
+            head = json.loads(f.read(json_len))
+            footer = {'values': [], 'meta': []}
+            if footer_at:
+                f.seek(footer_at)
+                footer = json.loads(f.read(footer_len))
+        self.H, self.W, self.agents = H, W, A
+        self.layer_names = head['layers']
+        self.info = head['info']
+        self.start = [tuple(p) for p in head['start']]
+        self.coord = np.dtype(f'<i{cbytes}')
+        self.event = _events(self.coord)
+        self.closed = bool(footer_at)
+        self.grid = np.memmap(path, np.uint8, 'r', HEAD.size + json_len, (H, W))
+        at = HEAD.size + json_len + H * W
+        at += -at % 8
+        stride = A * 2 * self.coord.itemsize
+        if not self.closed:
+            # Never closed: whole position records only, events from the sidecar
+            steps = (size - at) // stride if stride else 0
+            side = path + '.events'
+            n_events = os.path.getsize(side) // self.event.itemsize if os.path.exists(side) else 0
+            events_at, events_src = 0, side
+        else: events_src = path
+        self.steps = steps
+        self._pos = (np.memmap(path, self.coord, 'r', at, (steps, A, 2)) if steps and A
+                     else np.zeros((steps, A, 2), self.coord))
+        self.events = (np.memmap(events_src, self.event, 'r', events_at, (n_events,)) if n_events
+                       else np.zeros(0, self.event))
+        self._values = [None] + [_item(v) for v in footer['values']]
+        self._meta_at = [m[0] for m in footer['meta']]
+        self._meta = [m[1] for m in footer['meta']]
+        self._cursor = None  # (frame index, events applied, {layer: set})
+
+    # --- Playback ---
+    def __len__(self):
+        return self.steps
+
+    def positions(self, i):
+        return [tuple(p) for p in self._pos[i].tolist()]
+
+    def travelled(self):
+        # Cells moved per agent over the whole episode
+        total = np.zeros(self.agents, dtype=np.int64)
+        prev = np.array([self.start], dtype=np.int64).reshape(1, self.agents, 2)
+        for a in range(0, self.steps, CHUNK):
+            block = np.concatenate((prev, np.asarray(self._pos[a:a + CHUNK], dtype=np.int64)))
+            total += np.abs(np.diff(block, axis=0)).sum(axis=(0, 2))
+            prev = block[-1:]
+        return total.tolist()
+
+    def trail(self, i, j, n):
+        # Last n positions of agent j up to frame i (one entry per move). The
+        # window grows until it holds n moves; its first row stands for the
+        # run of steps it belongs to
+        span = n
+        while True:
+            lo = max(0, i + 1 - span)
+            h = np.asarray(self._pos[lo:i + 1, j])
+            if lo == 0: h = np.concatenate(([self.start[j]], h)).astype(self.coord)
+            keep = np.ones(len(h), dtype=bool)
+            keep[1:] = (h[1:] != h[:-1]).any(axis=1)
+            h = h[keep]
+            if len(h) >= n or lo == 0: return [tuple(p) for p in h[-n:].tolist()]
+            span *= 4
+
+    def _range(self, lo, hi):
+        # Index range of the events with lo <= step <= hi
+        step = self.events['step']
+        return np.searchsorted(step, lo, 'left'), np.searchsorted(step, hi, 'right')
+
+    def _decode(self, rows):
+        values = self._values
+        for layer, kind, value, r, c in zip(rows['layer'].tolist(), rows['kind'].tolist(), rows['value'].tolist(),
+                                            rows['r'].tolist(), rows['c'].tolist()):
+            cell = (r, c)
+            yield self.layer_names[layer], kind, (cell, values[value]) if value else cell
+
+    def changes(self, i):
+        # {layer: (added, removed)} committed at frame i
+        a, b = self._range(i, i)
+        out = {}
+        for name, kind, item in self._decode(self.events[a:b]):
+            out.setdefault(name, ([], []))[kind == REMOVE].append(item)
+        return out
+
+    def layers(self, i):
+        _, end = self._range(-1, i)
+        if self._cursor and self._cursor[0] <= i and end - self._cursor[1] <= 4096:
+            _, done, sets = self._cursor
+            for name, kind, item in self._decode(self.events[done:end]):
+                if kind == ADD: sets[name].add(item)
+                else: sets[name].discard(item)
+        else:
+            # Rebuild: an item is present if its last event up to i adds it
+            ev = self.events[:end]
+            V = len(self._values)
+            key = ((ev['layer'].astype(np.int64) * V + ev['value']) * self.H + ev['r']) * self.W + ev['c']
+            _, first = np.unique(key[::-1], return_index=True)
+            last = np.sort(len(key) - 1 - first)
+            rows = ev[last[ev['kind'][last] == ADD]]
+            sets = {name: set() for name in self.layer_names}
+            for name, _, item in self._decode(rows): sets[name].add(item)
+        self._cursor = (i, end, sets)
+        return sets
+
+    def meta(self, i):
+        t = bisect_right(self._meta_at, i)
+        return dict(self._meta[t - 1]) if t else {}
+
+    def __getitem__(self, i):
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError(i)
+        frame = {'agents': self.positions(i)}
+        for name, s in self.layers(i).items(): frame[name] = list(s)
+        frame.update(self.meta(i))
+        return frame
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        log = EpisodeLog(path)
+        counts = np.bincount(log.events['layer'], minlength=len(log.layer_names)) if len(log.events) else []
+        layers = ', '.join(f"{n}={int(k)}" for n, k in zip(log.layer_names, counts))
+        state = '' if log.closed else '  (not closed)'
+        print(f"{path}: {log.H}x{log.W}, {log.agents} agents, {len(log)} steps, events {layers or 'none'}{state}")
@@ -0,0 +1,160 @@
+import numpy as np
+
+# --- Occupancy Map ---
+# What the team knows about the world: every cell is UNKNOWN, FREE or
+# OCCUPIED. Agents reveal a disc of radius `radius` around themselves; walls
+# are seen but hide what lies behind them (each disc cell has a precomputed
+# ray of offsets that must all be see-through). The sensor's own cell is
+# always seen, even a wall it stands on. Cells are flat indices.
+UNKNOWN, FREE, OCCUPIED = -1, 0, 1
+
+
+def _rays(radius):
+    # Disc offsets and, per offset, the cells strictly between it and the centre
+    # (rows are padded to one length; `valid` marks the real samples)
+    r = np.arange(-radius, radius + 1)
+    dr, dc = np.meshgrid(r, r, indexing='ij')
+    keep = dr ** 2 + dc ** 2 <= radius ** 2
+    dr, dc = dr[keep], dc[keep]
+    steps = 2 * radius + 1
+    t = np.linspace(0, 1, steps + 1)[1:-1]
+    ray_r = np.rint(np.outer(dr, t)).astype(int)
+    ray_c = np.rint(np.outer(dc, t)).astype(int)
+    # Samples that land on the endpoint or the centre do not block the view
+    end = (ray_r == dr[:, None]) & (ray_c == dc[:, None])
+    centre = (ray_r == 0) & (ray_c == 0)
+    return dr, dc, ray_r, ray_c, ~(end | centre)
+
+
+class OccupancyMap:
+    def __init__(self, real_grid, radius=2):
+        self.real = np.asarray(real_grid)
+        self.H, self.W = self.real.shape
+        # One-cell border of OCCUPIED so neighbour lookups need no bounds checks
+        self._pad = np.full((self.H + 2, self.W + 2), OCCUPIED, dtype=np.int8)
+        self.known = self._pad[1:-1, 1:-1]
+        self.known.fill(UNKNOWN)
+        self.radius = radius
+        self._dr, self._dc, self._ray_r, self._ray_c, self._valid = _rays(radius)
+        self.frontier = set()  # known-free cells with an unknown 4-neighbour
+
+    def reveal(self, pos):
+        # Sense from pos; returns the flat indices of newly known cells
+        r, c = pos
+        rr, cc = r + self._dr, c + self._dc
+        inside = (rr >= 0) & (rr < self.H) & (cc >= 0) & (cc < self.W)
+        rr, cc = rr[inside], cc[inside]
+        walls = self.real[r + self._ray_r[inside], c + self._ray_c[inside]].astype(bool)
+        seen = ~(walls & self._valid[inside]).any(axis=1)
+        rr, cc = rr[seen], cc[seen]
+        new = self.known[rr, cc] == UNKNOWN
+        rr, cc = rr[new], cc[new]
+        if not rr.size: return rr
+        self.known[rr, cc] = self.real[rr, cc]
+        self._update_frontier(rr, cc)
+        return rr * self.W + cc
+
+    def _update_frontier(self, rr, cc):
+        # Only revealed cells and their neighbours can change frontier status
+        H, W = self.H, self.W
+        cand_r = np.concatenate([rr, rr + 1, rr - 1, rr, rr])
+        cand_c = np.concatenate([cc, cc, cc, cc + 1, cc - 1])
+        inside = (cand_r >= 0) & (cand_r < H) & (cand_c >= 0) & (cand_c < W)
+        cand = np.unique(cand_r[inside] * W + cand_c[inside])
+        pad = self._pad
+        r, c = np.divmod(cand, W)
+        r += 1; c += 1
+        unknown_nb = ((pad[r + 1, c] == UNKNOWN) | (pad[r - 1, c] == UNKNOWN) |
+                      (pad[r, c + 1] == UNKNOWN) | (pad[r, c - 1] == UNKNOWN))
+        is_front = (pad[r, c] == FREE) & unknown_nb
+        self.frontier.difference_update(cand[~is_front].tolist())
+        self.frontier.update(cand[is_front].tolist())
+
+    def unknown_free(self):
+        # Free cells of the real map nobody has seen yet
+        return int(((self.real == 0) & (self.known == UNKNOWN)).sum())
+
+
+# --- Frontier Clusters ---
+# 8-connected groups of frontier cells; each group is one place to go. Links
+# to the four "forward" neighbours are found with searchsorted on the sorted
+# cells, then every cell repeatedly takes the smallest label among its links
+# (with pointer jumping) until the labels settle.
+def frontier_clusters(frontier, W):
+    cells = np.sort(np.fromiter(frontier, dtype=np.int64, count=len(frontier)))
+    m = len(cells)
+    if not m: return []
+    c = cells % W
+    src, dst = [], []
+    for dr, dc in ((0, 1), (1, -1), (1, 0), (1, 1)):
+        nb = cells + dr * W + dc
+        j = np.minimum(np.searchsorted(cells, nb), m - 1)
+        hit = (cells[j] == nb) & (c + dc >= 0) & (c + dc < W)
+        src.append(np.flatnonzero(hit)); dst.append(j[hit])
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    label = np.arange(m)
+    while True:
+        low = np.minimum(label[src], label[dst])
+        new = label.copy()
+        np.minimum.at(new, src, low); np.minimum.at(new, dst, low)
+        new = new[new]
+        if (new == label).all(): break
+        label = new
+    order = np.argsort(label, kind='stable')
+    cuts = np.flatnonzero(np.diff(label[order])) + 1
+    return [g.tolist() for g in np.split(cells[order], cuts)]
+
+
+# --- Reachability ---
+# Cells a 4-connected walk from any of `cells` can reach over free space (a
+# vectorized flood over the neighbour table; the cells themselves may be
+# walls). Frontier clusters outside it cannot be explored from where the
+# agents are.
+def reachable(gmap, cells):
+    seen = np.zeros(gmap.n, dtype=bool)
+    front = np.unique(np.fromiter((gmap.index(p) for p in cells), dtype=np.int64, count=len(cells)))
+    seen[front] = True
+    while front.size:
+        nb = gmap.nbrs[front].ravel()
+        nb = np.unique(nb[nb >= 0])
+        front = nb[~seen[nb]]
+        seen[front] = True
+    return seen
+
+
+# --- Assignment ---
+# Agents take turns claiming the nearest frontier cluster nobody has claimed
+# yet (`taken` holds clusters already claimed by busy agents); once every
+# reachable cluster is claimed, agents double up on their nearest one. Each
+# claim is one BFS over the known free space that stops at the first frontier
+# cell it reaches. Returns a flat target cell (or None) per agent.
+def _nearest_frontier(gmap, start, owner):
+    nv = gmap._nv
+    s = gmap.index(start)
+    seen, layer = {s}, [s]
+    while layer:
+        for cur in layer:
+            if cur in owner: return cur
+        nxt = []
+        for cur in layer:
+            for j in range(cur * 4, cur * 4 + 4):
+                nb = nv[j]
+                if nb >= 0 and nb not in seen:
+                    seen.add(nb); nxt.append(nb)
+        layer = nxt
+    return None
+
+
+def assign_frontiers(gmap, positions, clusters, taken=()):
+    owner = {cell: k for k, cl in enumerate(clusters) for cell in cl}
+    free = {cell: k for cell, k in owner.items() if k not in taken}
+    targets = []
+    for pos in positions:
+        cell = _nearest_frontier(gmap, pos, free) if free else None
+        if cell is None:
+            cell = _nearest_frontier(gmap, pos, owner)
+        else:
+            k = free[cell]
+            for c in clusters[k]: del free[c]
+        targets.append(cell)
+    return targets
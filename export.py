@@ -0,0 +1,353 @@
+import argparse
+import importlib
+import os
+import shutil
+import subprocess
+import time
+from multiprocessing import Pool
+import numpy as np
+from params import parse_values
+
+# --- Offline Export ---
+# Turns a finished run() into a GIF, an MP4 or a raw .npy stack without a
+# display or matplotlib. A Painter rasterizes each frame with numpy alone:
+# the map is a cell image scaled up once, and every marker is a small stencil
+# stamped at its cells with one fancy-index write per layer. Walking forward
+# through a FrameRecorder only redraws the cells its deltas and agent moves
+# touch. Pixels hold palette indices, so a GIF frame needs no colour
+# quantizing, and RGB is a single palette lookup.
+#
+# Frame ranges are split into shards on a process pool. For a GIF the
+# workers also encode: each frame is cropped to the box that changed since
+# the previous one, with unchanged pixels in it left transparent, and the
+# parent only appends the bytes in order. Other formats get RGB shards,
+# streamed into ffmpeg (MP4 and the like) or into a memory-mapped .npy.
+#
+#   python export.py warehouse4 warehouse4.gif --seed 3 --scale 8
+#   python export.py fire9 fire9.mp4 --param n_agents=6 --fps 20
+
+SCALE = 8  # pixels per cell
+
+# Map colours per scenario, matching animate(); 'agents' is used when the
+# result has no 'colors'
+THEMES = {
+    'maze1': {'floor': (0.1, 0.1, 0.1), 'wall': (0.05, 0.05, 0.1)},
+    'crew2': {'floor': (0.2, 0.2, 0.2), 'wall': (0.1, 0.1, 0.1)},
+    'path3': {'floor': (0.1, 0.1, 0.1), 'wall': (0.05, 0.05, 0.1), 'agents': ['#00FFFF', '#FF00FF']},
+    'warehouse4': {'floor': (0.15, 0.15, 0.15), 'wall': (0.05, 0.05, 0.05)},
+    'rescue5': {'floor': (0.1, 0.1, 0.1), 'wall': (0.3, 0.3, 0.3), 'agents': ['#00E676']},
+    'drone6': {'floor': (0.08, 0.17, 0.31), 'wall': (0.02, 0.11, 0.37)},  # blended over the blue face
+    'grid7': {'floor': (0.2, 0.2, 0.2), 'wall': (0.1, 0.1, 0.1)},
+    'resource8': {'floor': (0.2, 0.2, 0.2), 'wall': (0.1, 0.05, 0.05), 'agents': ['#CDDC39']},
+    'fire9': {'floor': (0.1, 0.1, 0.1), 'wall': (0.3, 0.3, 0.3), 'agents': ['#2962FF']},
+    'map10': {'floor': (0, 0, 0), 'wall': (0, 0, 0)},  # fog: only what the layers reveal
+}
+
+# Recorder layers: (colour, stencil); painted items carry their own colour
+LAYERS = {
+    'explored': ((0.4, 0.4, 0.4), 'cell'),
+    'walls': ((0.15, 0.1, 0.1), 'cell'),
+    'keys': ('#FFD700', 'diamond'),
+    'dirt': ('#795548', 'disc'),
+    'items': ('#FF5722', 'square'),
+    'victims': ('red', 'plus'),
+    'packs': ('#FFD740', 'diamond'),
+    'res': ('#FFD700', 'disc'),
+    'fires': ('#FF3D00', 'triangle'),
+    'painted': ('white', 'square'),
+    'goals': ('#00FF00', 'cross'),
+}
+
+
+# Colour names the scenarios use (same values as matplotlib's); anything else
+# is '#rrggbb' or an (r, g, b) tuple of floats
+NAMED = {
+    'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (255, 0, 0), 'green': (0, 128, 0),
+    'blue': (0, 0, 255), 'yellow': (255, 255, 0), 'cyan': (0, 255, 255), 'magenta': (255, 0, 255),
+    'orange': (255, 165, 0), 'gray': (128, 128, 128), 'grey': (128, 128, 128),
+}
+
+
+def _rgb(color):
+    if isinstance(color, str):
+        if color.startswith('#') and len(color) == 7: return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+        if color not in NAMED: raise ValueError(f"unknown colour {color!r}")
+        return NAMED[color]
+    return tuple(int(round(v * 255)) for v in color[:3])
+
+
+def _stencil(shape, s):
+    # (dy, dx) pixel offsets of a marker inside an s x s cell
+    y, x = np.mgrid[:s, :s] + 0.5 - s / 2
+    ax, ay = np.abs(x), np.abs(y)
+    mask = {'cell': np.ones((s, s), dtype=bool),
+            'square': np.maximum(ax, ay) <= 0.35 * s,
+            'disc': x * x + y * y <= (0.4 * s) ** 2,
+            'rim': x * x + y * y <= (0.48 * s) ** 2,
+            'diamond': ax + ay <= 0.45 * s,
+            'triangle': (ay <= 0.4 * s) & (ax <= (y + 0.4 * s) / 2),
+            'plus': np.minimum(ax, ay) <= 0.12 * s,
+            'cross': (np.abs(ax - ay) <= 0.12 * s) & (np.maximum(ax, ay) <= 0.4 * s)}[shape]
+    if not mask.any(): mask[s // 2, s // 2] = True
+    return np.nonzero(mask)
+
+
+class Painter:
+    def __init__(self, result, theme=None, scale=SCALE):
+        theme = theme or {}
+        grid = result['grid']
+        self.H, self.W = grid.shape
+        self.s = scale
+        self.frames = result.get('frames')
+        self.hist = result.get('hist')
+        self.n = len(self.frames) if self.frames is not None else result['steps']
+
+        # Palette: every colour a frame can use, fixed before any frame is
+        # painted so all workers agree on the indices
+        self.colors, self._slot, self._known = [], {}, {}
+        floor, wall = self._ink(theme.get('floor', (0.1, 0.1, 0.1))), self._ink(theme.get('wall', (0.05, 0.05, 0.1)))
+        self.white = self._ink('white')
+        start = self._positions(0)
+        look = result.get('colors') or theme.get('agents') or ['white']
+        self.agent_ink = np.array([self._ink(look[j % len(look)]) for j in range(len(start))], dtype=np.uint8)
+        self.layer_ink = {name: self._ink(color) for name, (color, _) in LAYERS.items()}
+        final = self._layers(self.n - 1)
+        for items in final.values():
+            for item in items:
+                if isinstance(item[0], tuple): self._ink(item[1])
+        self.palette = np.array(self.colors, dtype=np.uint8)
+
+        self._floor = np.where(grid == 1, wall, floor).astype(np.uint8)
+        self.base = self._floor.repeat(scale, 0).repeat(scale, 1)
+        self._stencils = {}
+        # Cell state of the frame in _img: layer ink per cell (-1: empty),
+        # goal cells, and the agent drawn on each cell (-1: none)
+        self._at, self._img, self._pos = None, None, None
+        self._cells = {name: np.full((self.H, self.W), -1, dtype=np.int16) for name in final}
+        self._goal = np.zeros((self.H, self.W), dtype=bool)
+        for r, c in result.get('goals') or (): self._goal[r, c] = True
+        self._agent = np.full((self.H, self.W), -1, dtype=np.int32)
+
+    def _ink(self, color):
+        key = color if isinstance(color, str) else tuple(color)
+        if key not in self._known:
+            rgb = _rgb(color)
+            if rgb not in self._slot:
+                if len(self.colors) == 255: raise ValueError("more than 255 colours")  # one left for GIF transparency
+                self._slot[rgb] = len(self.colors)
+                self.colors.append(rgb)
+            self._known[key] = self._slot[rgb]
+        return self._known[key]
+
+    def __len__(self):
+        return self.n
+
+    def _positions(self, i):
+        if self.frames is not None: return self.frames.positions(i)
+        return [h[min(i, len(h) - 1)] for h in self.hist.values()]
+
+    def _layers(self, i):
+        return self.frames.layers(i) if self.frames is not None else {}
+
+    def _item(self, name, item):
+        # (r, c, ink) of a layer item; painted items are (cell, colour) pairs
+        if isinstance(item[0], tuple):
+            c = item[1]
+            return item[0] + (self._known.get(c if isinstance(c, str) else tuple(c), self.layer_ink.get(name, self.white)),)
+        return item + (self.layer_ink.get(name, self.white),)
+
+    def _stamp(self, img, cells, shape, ink):
+        if shape not in self._stencils: self._stencils[shape] = _stencil(shape, self.s)
+        dy, dx = self._stencils[shape]
+        cells = cells * self.s
+        if not np.isscalar(ink): ink = np.repeat(ink, len(dy))
+        img[(cells[:, :1] + dy).ravel(), (cells[:, 1:] + dx).ravel()] = ink
+
+    def _place(self, pos):
+        self._pos = pos
+        self._agent.fill(-1)
+        if pos:
+            rc = np.array(pos)
+            self._agent[rc[:, 0], rc[:, 1]] = np.arange(len(pos))  # later agents on top
+
+    def _draw(self, idx, fresh=False):
+        # Redraw cells idx (flat, unique) from the cell state
+        img = self._img
+        rc = np.stack(np.divmod(idx, self.W), 1)
+        if not fresh: self._stamp(img, rc, 'cell', self._floor.flat[idx])
+        for name, cells in self._cells.items():
+            ink = cells.flat[idx]
+            on = ink >= 0
+            if on.any(): self._stamp(img, rc[on], LAYERS.get(name, (None, 'square'))[1], ink[on].astype(np.uint8))
+        on = self._goal.flat[idx]
+        if on.any(): self._stamp(img, rc[on], 'cross', self.layer_ink['goals'])
+        who = self._agent.flat[idx]
+        on = who >= 0
+        if on.any():
+            self._stamp(img, rc[on], 'rim', self.white)
+            self._stamp(img, rc[on], 'disc', self.agent_ink[who[on]])
+
+    def _repaint(self, i):
+        for cells in self._cells.values(): cells.fill(-1)
+        for name, items in self._layers(i).items():
+            cells = self._cells[name]
+            for item in items:
+                r, c, ink = self._item(name, item)
+                cells[r, c] = ink
+        self._place(self._positions(i))
+        self._img = self.base.copy()
+        self._draw(np.arange(self.H * self.W), fresh=True)
+
+    def _advance(self, i):
+        # Frame i from frame i-1: only cells whose contents changed
+        W = self.W
+        dirty = []
+        for name, (added, removed) in self.frames.changes(i).items():
+            cells = self._cells[name]
+            for item in removed:
+                r, c, _ = self._item(name, item)
+                cells[r, c] = -1
+                dirty.append(r * W + c)
+            for item in added:
+                r, c, ink = self._item(name, item)
+                cells[r, c] = ink
+                dirty.append(r * W + c)
+        old, pos = self._pos, self._positions(i)
+        moved = [j for j in range(len(pos)) if pos[j] != old[j]]
+        if moved:
+            for j in moved: dirty += [old[j][0] * W + old[j][1], pos[j][0] * W + pos[j][1]]
+            self._place(pos)
+        if dirty: self._draw(np.unique(dirty))
+
+    def paint(self, i):
+        # Frame i as an (H*s, W*s) array of palette indices. Stepping forward
+        # one frame at a time only redraws the cells that changed
+        if self._at is not None and i == self._at + 1 and self.frames is not None: self._advance(i)
+        elif i != self._at: self._repaint(i)
+        self._at = i
+        return self._img.copy()
+
+    def rgb(self, i):
+        return np.take(self.palette, self.paint(i), axis=0)
+
+
+# --- Workers ---
+_painter = None
+
+
+def _init(payload, theme, scale):
+    global _painter
+    _painter = Painter(payload, theme, scale)
+
+
+def _gif_shard(p, a, b, ms):
+    # Encoded GIF frames a..b-1. Each is cropped to the box that changed since
+    # the previous frame, and unchanged pixels inside it are transparent
+    from PIL import GifImagePlugin, Image
+    out = []
+    clear = len(p.colors)  # the spare palette slot
+    flat = p.palette.ravel().tolist() + [0, 0, 0]
+    prev = p.paint(a - 1) if a else None
+    for i in range(a, b):
+        cur = p.paint(i)
+        if prev is None:
+            y0, y1, x0, x1 = 0, cur.shape[0], 0, cur.shape[1]
+            crop = cur
+        else:
+            diff = cur != prev
+            rows = np.flatnonzero(diff.any(1))
+            if len(rows):
+                cols = np.flatnonzero(diff.any(0))
+                y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            else: y0, y1, x0, x1 = 0, 1, 0, 1  # still a frame, for its delay
+            crop = np.where(diff[y0:y1, x0:x1], cur[y0:y1, x0:x1], np.uint8(clear))
+        im = Image.frombytes('P', (int(x1 - x0), int(y1 - y0)), np.ascontiguousarray(crop).tobytes())
+        im.putpalette(flat)
+        params = {'duration': ms, 'disposal': 1}
+        if prev is not None: params['transparency'] = clear
+        out += GifImagePlugin.getdata(im, offset=(int(x0), int(y0)), **params)
+        prev = cur
+    return b''.join(out)
+
+
+def _shard(task):
+    a, b, kind, ms = task
+    if kind == 'gif': return _gif_shard(_painter, a, b, ms)
+    return np.stack([_painter.rgb(i) for i in range(a, b)])
+
+
+# --- Writers ---
+def _writer(out, painter, fps, ms):
+    # (write(shard), close()) for the format named by out's extension
+    ext = os.path.splitext(out)[1].lower()
+    Hp, Wp = painter.H * painter.s, painter.W * painter.s
+    if ext == '.gif':
+        from PIL import GifImagePlugin, Image
+        f = open(out, 'wb')
+        im = Image.new('P', (Wp, Hp))
+        im.putpalette(painter.palette.ravel().tolist() + [0, 0, 0])  # and the transparent slot
+        header, _ = GifImagePlugin.getheader(im, info={'loop': 0, 'duration': ms})
+        f.write(b''.join(header))
+        def close():
+            f.write(b';')
+            f.close()
+        return f.write, close
+    if ext == '.npy':
+        stack = np.lib.format.open_memmap(out, 'w+', np.uint8, (len(painter), Hp, Wp, 3))
+        at = [0]
+        def write(chunk):
+            stack[at[0]:at[0] + len(chunk)] = chunk
+            at[0] += len(chunk)
+        return write, stack.flush
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError(f"writing {ext or out} needs ffmpeg on PATH (.gif and .npy do not)")
+    proc = subprocess.Popen([ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                             '-s', f"{Wp}x{Hp}", '-r', str(fps), '-i', '-',
+                             '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', out],
+                            stdin=subprocess.PIPE)
+    def close():
+        proc.stdin.close()
+        if proc.wait(): raise RuntimeError(f"ffmpeg exited with status {proc.returncode}")
+    return lambda chunk: proc.stdin.write(chunk.tobytes()), close
+
+
+def export(result, out, theme=None, scale=SCALE, fps=10, workers=None, shard=None):
+    # Writes every frame of result to out; returns the number of frames
+    payload = {k: result[k] for k in ('grid', 'frames', 'hist', 'steps', 'goals', 'colors') if k in result}
+    painter = Painter(payload, theme, scale)
+    n = len(painter)
+    workers = workers or os.cpu_count()
+    shard = shard or max(1, min(256, -(-n // (workers * 4))))
+    kind = 'gif' if out.lower().endswith('.gif') else 'rgb'
+    ms = round(1000 / fps)
+    tasks = [(a, min(a + shard, n), kind, ms) for a in range(0, n, shard)]
+    write, close = _writer(out, painter, fps, ms)
+    try:
+        with Pool(workers, _init, (payload, theme, scale)) as pool:
+            for chunk in pool.imap(_shard, tasks): write(chunk)
+    finally:
+        close()
+    return n
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="Run a scenario and export its frames without a display")
+    ap.add_argument('scenario', help="module name, e.g. warehouse4")
+    ap.add_argument('out', help="output file: .gif, .npy, or anything ffmpeg writes (.mp4, ...)")
+    ap.add_argument('--seed', type=int, default=None, help="run(seed=...)")
+    ap.add_argument('--param', action='append', default=[], metavar='NAME=VALUE', help="run() keyword (repeatable)")
+    ap.add_argument('--scale', type=int, default=SCALE, help="pixels per cell")
+    ap.add_argument('--fps', type=int, default=10)
+    ap.add_argument('--workers', type=int, help="processes (default: all cores)")
+    args = ap.parse_args()
+
+    params = {}
+    for p in args.param:
+        name, value = p.split('=', 1)
+        params[name] = parse_values(value)[0]
+    if args.seed is not None: params['seed'] = args.seed
+    result = importlib.import_module(args.scenario).run(**params)
+    t = time.perf_counter()
+    n = export(result, args.out, THEMES.get(args.scenario), args.scale, args.fps, args.workers)
+    print(f"{n} frames in {time.perf_counter() - t:.1f}s -> {args.out}")
@@ -0,0 +1,116 @@
+import heapq
+import numpy as np
+
+# --- Multi-Source Distance Fields ---
+# One BFS distance map from every goal at once. Agents descend the map (step to
+# a neighbour one closer) instead of searching. `owner` records which goal each
+# cell descends to, so removing a goal only re-floods the cells it owned and
+# adding one only touches the cells it is now closest to.
+INF = np.iinfo(np.int32).max
+
+
+class DistanceField:
+    def __init__(self, gmap, goals=()):
+        self.gmap = gmap
+        self.dist = np.full(gmap.n, INF, dtype=np.int32)
+        self.owner = np.full(gmap.n, -1, dtype=np.int32)
+        self.goals = set()
+        self._dv, self._ov = memoryview(self.dist), memoryview(self.owner)
+        self.rebuild(goals)
+
+    def _free_goals(self, cells):
+        free = self.gmap.grid.reshape(-1) == 0
+        return [i for i in (self.gmap.index(p) for p in cells) if free[i]]
+
+    # --- Full build: vectorized wavefront over the neighbour table ---
+    def rebuild(self, goals):
+        dist, owner, nbrs = self.dist, self.owner, self.gmap.nbrs
+        self.goals = set(self._free_goals(goals))
+        dist.fill(INF); owner.fill(-1)
+        front = np.fromiter(self.goals, dtype=np.int32, count=len(self.goals))
+        dist[front] = 0; owner[front] = front
+        d = 0
+        while front.size:
+            d += 1
+            nb = nbrs[front].ravel()
+            src = np.repeat(owner[front], 4)
+            keep = nb >= 0
+            nb, src = nb[keep], src[keep]
+            keep = dist[nb] == INF
+            nb, src = nb[keep], src[keep]
+            nb, first = np.unique(nb, return_index=True)
+            dist[nb] = d; owner[nb] = src[first]
+            front = nb
+
+    # --- Incremental updates ---
+    def add_goals(self, cells):
+        new = [i for i in self._free_goals(cells) if i not in self.goals]
+        if not new: return
+        self.goals.update(new)
+        for i in new:
+            self._dv[i] = 0; self._ov[i] = i
+        self._propagate(new)
+
+    def remove_goals(self, cells):
+        gone = self.goals.intersection(self.gmap.index(p) for p in cells)
+        if not gone: return
+        self.goals -= gone
+        dist, owner, nbrs = self.dist, self.owner, self.gmap.nbrs
+        affected = np.flatnonzero(np.isin(owner, np.fromiter(gone, dtype=np.int32, count=len(gone))))
+        dist[affected] = INF; owner[affected] = -1
+        # Re-flood the orphaned cells from the still-valid cells around them
+        seeds = nbrs[affected].ravel()
+        seeds = np.unique(seeds[seeds >= 0])
+        seeds = seeds[dist[seeds] != INF]
+        self._propagate(seeds.tolist())
+
+    def _propagate(self, seeds):
+        # Dial's algorithm: bucket queue keyed by distance, stale entries skipped
+        dv, ov, nv = self._dv, self._ov, self.gmap._nv
+        buckets = {}
+        for i in seeds: buckets.setdefault(dv[i], []).append(i)
+        keys = list(buckets)
+        heapq.heapify(keys)
+        while keys:
+            d = heapq.heappop(keys)
+            nd = d + 1
+            for cur in buckets.pop(d):
+                if dv[cur] != d: continue
+                o = ov[cur]
+                k = cur * 4
+                for j in range(k, k + 4):
+                    nb = nv[j]
+                    if nb >= 0 and nd < dv[nb]:
+                        dv[nb] = nd; ov[nb] = o
+                        if nd not in buckets:
+                            buckets[nd] = []
+                            heapq.heappush(keys, nd)
+                        buckets[nd].append(nb)
+
+    # --- Queries ---
+    def distance(self, pos):
+        d = self._dv[self.gmap.index(pos)]
+        return None if d == INF else d
+
+    def goal_of(self, pos):
+        o = self._ov[self.gmap.index(pos)]
+        return None if o < 0 else self.gmap.cell(o)
+
+    def step(self, pos):
+        # Neighbour closest to a goal (None at a goal or if no neighbour is closer).
+        # Also lets an agent that starts on a blocked cell step off it.
+        i = self.gmap.index(pos)
+        nv, dv = self.gmap._nv, self._dv
+        best, best_d = -1, dv[i]
+        for j in range(i * 4, i * 4 + 4):
+            nb = nv[j]
+            if nb >= 0 and dv[nb] < best_d: best, best_d = nb, dv[nb]
+        return None if best < 0 else self.gmap.cell(best)
+
+    def path(self, pos):
+        if self.distance(pos) is None: return None
+        out = [pos]
+        while True:
+            nxt = self.step(out[-1])
+            if nxt is None: return out
+            out.append(nxt)
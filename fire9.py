@@ -1,86 +1,80 @@
-import numpy as np
 import random
-from collections import deque
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import numpy as np
+from episodelog import EpisodeWriter
+from fields import DistanceField
+from pathfinding import GridMap
+from recorder import FrameRecorder
+from world import make_grid, spawn
+
+# --- Fire Spread ---
+# One tick for every burning cell at once: gather its free neighbours from the
+# neighbour table, draw one uniform per (cell, direction) pair in a single call
+# and light the hits. `burning` is a flat boolean array, updated in place.
+def spread(gmap, burning, p, nrng):
+    nb = gmap.nbrs[np.flatnonzero(burning)].ravel()
+    hit = (nb >= 0) & (nrng.random(nb.size) < p)
+    new = nb[hit]
+    new = np.unique(new[~burning[new]])
+    burning[new] = True
+    return new
+
+def run(seed=21, H=16, W=16, n_agents=3, n_fires=5, spread_p=0.05, density=0.03, max_steps=400, log=None):
+    rng = random.Random(seed)
+    nrng = np.random.default_rng(seed)
+    grid = make_grid(rng, H, W, density)
+    gmap = GridMap(grid)
 
-def bfs(start, goals, H, W, grid):
-    q = deque([start]); parent = {start: None}; visited = {start}
-    while q:
-        cur = q.popleft()
-        if cur in goals:
-            path = []; 
-            while cur: path.append(cur); cur = parent[cur]
-            return path[::-1]
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0 and (nr,nc) not in visited:
-                visited.add((nr,nc)); parent[(nr,nc)]=cur; q.append((nr,nc))
-    return None
+    starts = spawn(rng, grid, n_agents, [(0,0), (0,W-1), (H-1,W-1)])
+    agents = [{'pos':p} for p in starts]
+    fires = {(rng.randint(3,H-4), rng.randint(3,W-4)) for _ in range(n_fires)}
+    burning = np.zeros(gmap.n, dtype=bool)
+    burning[[gmap.index(f) for f in fires]] = True
 
-H, W = 16, 16
-grid = np.zeros((H, W), dtype=int)
-random.seed(21)
-for r in range(H):
-    for c in range(W): 
-        if random.random() < 0.03: grid[r, c] = 1
+    # Distance map from every fire, kept current as fires spread and go out
+    field = DistanceField(gmap, fires)
+    frames = FrameRecorder(starts, sink=EpisodeWriter(log, grid) if log else None, fires=fires)
+    for _ in range(max_steps):
+        if not burning.any(): break
 
-agents = [{'pos':p, 'path':[], 'task':None} for p in [(0,0), (0,W-1), (H-1,W-1)]]
-fires = {(random.randint(3,H-4), random.randint(3,W-4)) for _ in range(5)}
+        # Move & Extinguish: each agent descends toward its nearest fire
+        for a in agents:
+            nxt = field.step(a['pos'])
+            if nxt: a['pos'] = nxt
 
-frames = []
-for _ in range(400):
-    if not fires: break
-    
-    # Assign
-    for a in agents:
-        if not a['task'] and fires:
-            a['task'] = min(fires, key=lambda x: abs(x[0]-a['pos'][0]) + abs(x[1]-a['pos'][1]))
-            path = bfs(a['pos'], {a['task']}, H, W, grid)
-            if path: a['path'] = path
-    
-    # Move & Extinguish
-    for a in agents:
-        if a['path']:
-            if len(a['path']) > 1: a['path'].pop(0); a['pos'] = a['path'][0]
-        
-        if a['pos'] in fires:
-            fires.remove(a['pos'])
-            a['task'] = None
-            a['path'] = []
+            i = gmap.index(a['pos'])
+            if burning[i]:
+                burning[i] = False
+                frames.remove('fires', a['pos'])
+                field.remove_goals([a['pos']])
 
-    # Spread
-    new_fires = set(fires)
-    for f in fires:
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = f[0]+dr, f[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0:
-                if random.random() < 0.05: # 5% spread chance
-                    new_fires.add((nr, nc))
-    fires = new_fires
-    
-    frames.append({'agents': [a['pos'] for a in agents], 'fires': list(fires)})
+        # Spread
+        new_fires = [gmap.cell(i) for i in spread(gmap, burning, spread_p, nrng).tolist()]
+        for f in new_fires: frames.add('fires', f)
+        field.add_goals(new_fires)
 
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('black')
+        frames.commit([a['pos'] for a in agents])
 
-def render(frame):
-    ax.clear(); ax.axis('off')
-    data = frames[frame]
-    
+    frames.close()
+    return {'grid': grid, 'frames': frames, 'steps': len(frames), 'remaining': int(burning.sum())}
+
+def animate(result):
+    from render import Board, xy
+
+    grid, frames = result['grid'], result['frames']
+    H, W = grid.shape
     canvas = np.zeros((H, W, 3)) + 0.1
     canvas[grid==1] = [0.3, 0.3, 0.3]
-    ax.imshow(canvas, extent=[0, W, H, 0])
-
-    if data['fires']:
-        fy, fx = zip(*data['fires'])
-        ax.scatter(fx, fy, c='#FF3D00', s=120, marker='^', alpha=0.8, label='Fire')
+    board = Board(canvas, 'black')
+    fires = board.points(c='#FF3D00', s=120, marker='^', alpha=0.8, label='Fire')
+    agents = board.points(frames.positions(0), c='#2962FF', s=180, marker='o', edgecolors='white')
 
-    for pos in data['agents']:
-        ax.scatter(pos[1], pos[0], c='#2962FF', s=180, marker='o', edgecolors='white')
+    def render(frame):
+        data = frames[frame]
+        fires.set_offsets(xy(data['fires']))
+        agents.set_offsets(xy(data['agents']))
+        board.title.set_text(f"FIREFIGHTERS | Active Fires: {len(data['fires'])}")
 
-    ax.set_title(f"FIREFIGHTERS | Active Fires: {len(data['fires'])}", color='white')
-    ax.set_ylim(H-0.5, -0.5); ax.set_xlim(-0.5, W-0.5)
+    return board.play(render, len(frames), interval=100)
 
-anim = FuncAnimation(fig, render, frames=len(frames), interval=100, repeat=False)
-plt.show()
\ No newline at end of file
+if __name__ == '__main__':
+    animate(run())
@@ -1,78 +1,74 @@
-import numpy as np
 import random
-from collections import deque
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import numpy as np
+from boustrophedon import CoveragePlanner
+from episodelog import EpisodeWriter
+from pathfinding import GridMap
+from recorder import FrameRecorder
+from world import make_grid, spawn
 
-def bfs(start, goals, H, W, grid):
-    q = deque([start]); parent = {start: None}; visited = {start}
-    while q:
-        cur = q.popleft()
-        if cur in goals:
-            path = []
-            while cur: path.append(cur); cur = parent[cur]
-            return path[::-1]
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0 and (nr,nc) not in visited:
-                visited.add((nr,nc)); parent[(nr,nc)]=cur; q.append((nr,nc))
-    return None
+COLORS = ['#E040FB', '#00E5FF']
 
-H, W = 12, 12
-grid = np.zeros((H, W), dtype=int)
-random.seed(8)
-for r in range(H):
-    for c in range(W): 
-        if random.random() < 0.05: grid[r, c] = 1
+def run(seed=8, H=12, W=12, n_agents=2, paint_p=0.4, density=0.05, max_steps=400, log=None):
+    rng = random.Random(seed)
+    grid = make_grid(rng, H, W, density)
+    gmap = GridMap(grid)
 
-to_paint = {(r, c) for r in range(H) for c in range(W) if grid[r, c] == 0 and random.random() < 0.4}
+    to_paint = {(r, c) for r in range(H) for c in range(W) if grid[r, c] == 0 and rng.random() < paint_p}
 
-painters = [
-    {'pos':(0,0), 'path':[], 'color':'#E040FB', 'rem':{p for p in to_paint if (p[0]+p[1])%2==0}},
-    {'pos':(H-1,W-1), 'path':[], 'color':'#00E5FF', 'rem':{p for p in to_paint if (p[0]+p[1])%2!=0}}
-]
+    # Checkerboard split: painter i takes the cells with (r + c) % n_agents == i
+    starts = spawn(rng, grid, n_agents, [(0,0), (H-1,W-1)])
+    planner = CoveragePlanner(gmap)
+    routes = planner.plan(starts, to_paint, split='parity')
+    painters = [{'pos':s, 'path':route, 'color':COLORS[i % len(COLORS)],
+                 'rem':{p for p in to_paint if (p[0]+p[1]) % n_agents == i}} for i, (s, route) in enumerate(zip(starts, routes))]
 
-curr_painted = set()
-frames = []
+    frames = FrameRecorder(starts, sink=EpisodeWriter(log, grid) if log else None, painted=())
 
-for _ in range(400):
-    if all(not p['rem'] for p in painters): break
-    
-    for p in painters:
-        if not p['path'] and p['rem']:
-            target = min(p['rem'], key=lambda x: abs(x[0]-p['pos'][0])+abs(x[1]-p['pos'][1]))
-            path = bfs(p['pos'], {target}, H, W, grid)
-            if path: p['path'] = path
-        
-        if p['path']:
-            if len(p['path'])>1: p['path'].pop(0); p['pos'] = p['path'][0]
-        
+    def paint(p):
         if p['pos'] in p['rem']:
             p['rem'].remove(p['pos'])
-            curr_painted.add((p['pos'], p['color']))
-    
-    frames.append({'agents': [p['pos'] for p in painters], 'painted': list(curr_painted)})
+            frames.add('painted', (p['pos'], p['color']))
+
+    for p in painters: paint(p) # A painter may start on one of its own cells
+
+    for _ in range(max_steps):
+        for p in painters:
+            if p['path']:
+                p['pos'] = p['path'].advance()
+                if not p['path'].remaining(): p['path'] = None
+            paint(p)
+
+        frames.commit([p['pos'] for p in painters])
+        # Done once every sweep is finished (anything left over is unreachable)
+        if all(not p['path'] for p in painters): break
+
+    frames.close()
+    return {'grid': grid, 'frames': frames, 'colors': [p['color'] for p in painters],
+            'steps': len(frames), 'remaining': sum(len(p['rem']) for p in painters),
+            'searches': planner.searches}
 
-print(f"Painting finished. Frames: {len(frames)}")
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('#212121')
+def animate(result):
+    from render import Board, xy
 
-def render(frame):
-    ax.clear(); ax.axis('off')
-    data = frames[frame]
-    
+    grid, frames, colors = result['grid'], result['frames'], result['colors']
+    H, W = grid.shape
     canvas = np.zeros((H, W, 3)) + 0.2
     canvas[grid==1] = [0.1, 0.1, 0.1]
-    ax.imshow(canvas, extent=[0, W, H, 0])
-    
-    for (pos, col) in data['painted']:
-        ax.scatter(pos[1], pos[0], c=col, s=180, marker='s', alpha=0.9)
+    board = Board(canvas, '#212121')
+    paint = board.points(s=180, marker='s', alpha=0.9)
+    agents = board.points(frames.positions(0), c=colors, s=200, edgecolors='white', linewidth=2)
 
-    for i, pos in enumerate(data['agents']):
-        ax.scatter(pos[1], pos[0], c=painters[i]['color'], s=200, edgecolors='white', linewidth=2)
+    def render(frame):
+        data = frames[frame]
+        painted = data['painted']
+        paint.set_offsets(xy([pos for pos, _ in painted]))
+        paint.set_facecolors([col for _, col in painted])
+        agents.set_offsets(xy(data['agents']))
+        board.title.set_text(f"GRID PAINTERS | Painted: {len(painted)}")
 
-    ax.set_title(f"GRID PAINTERS | Painted: {len(data['painted'])}", color='white')
-    ax.set_xlim(-0.5, W-0.5); ax.set_ylim(H-0.5, -0.5)
+    return board.play(render, len(frames), interval=80)
 
-anim = FuncAnimation(fig, render, frames=len(frames), interval=80, repeat=False)
-plt.show()
\ No newline at end of file
+if __name__ == '__main__':
+    result = run()
+    print(f"Painting finished. Frames: {len(result['frames'])}")
+    animate(result)
@@ -0,0 +1,246 @@
+import heapq
+from array import array
+import numpy as np
+from pathfinding import Path
+
+# --- Hierarchical Pathfinding (HPA*) ---
+# The grid is cut into C x C clusters. Where two clusters touch, every run of
+# cell pairs free on both sides is an entrance: one crossing in the middle of
+# a short run, one at each end of a run of 6 or more. The crossing cells are
+# the abstract nodes; a crossing is an edge of cost 1, and nodes of the same
+# cluster are joined by their BFS distance inside it. A query links start and
+# goal into their clusters, runs A* over the abstract graph and refines each
+# hop with a BFS confined to one cluster. Routes are near-optimal (they only
+# cross clusters at entrances), not always shortest; endpoints less than a
+# cluster apart are searched flat with GridMap.jps instead.
+#
+# Everything is built up front. Distances inside clusters come from one
+# bit-parallel BFS over all clusters at once: each cluster is a C x C block,
+# and bit j of a cell says node j of its cluster has reached it. When gmap
+# cells change, the next query finds them by diffing the grid and rebuilds
+# only the borders of their clusters and the clusters next to those.
+
+class HierarchicalPlanner:
+    def __init__(self, gmap, cluster=16):
+        self.gmap = gmap
+        self.C = cluster
+        H, W = gmap.H, gmap.W
+        self.CH, self.CW = -(-H // cluster), -(-W // cluster)
+        r, c = np.divmod(np.arange(gmap.n), W)
+        self._cid = ((r // cluster) * self.CW + c // cluster).astype(np.int32)
+        self._cv = memoryview(self._cid)
+        self.expanded = 0    # abstract nodes expanded by the last query
+        self.rebuilt = 0     # clusters rebuilt after grid changes, in total
+        self._borders = {}   # border key -> [(cell, cell across)]
+        self._partner = {}   # node -> nodes across its entrances
+        self._nodes = {}     # cluster -> entrance nodes inside it
+        self._intra = {}     # cluster -> {node: [(node, dist)]}
+        self._snap = gmap.grid.copy()
+        self._version = gmap.version
+        for key in self._all_borders(): self._set_border(key)
+        for k in range(self.CH * self.CW): self._collect(k)
+        self._fill(range(self.CH * self.CW))
+
+    # --- Abstract graph ---
+    def _all_borders(self):
+        for cr in range(self.CH):
+            for cc in range(self.CW):
+                if cc: yield ('v', cr, cc)
+                if cr: yield ('h', cr, cc)
+
+    def _cluster_borders(self, k):
+        cr, cc = divmod(k, self.CW)
+        if cc: yield ('v', cr, cc)
+        if cc + 1 < self.CW: yield ('v', cr, cc + 1)
+        if cr: yield ('h', cr, cc)
+        if cr + 1 < self.CH: yield ('h', cr + 1, cc)
+
+    def _set_border(self, key):
+        # ('v', cr, cc): between clusters (cr, cc-1) and (cr, cc); 'h' likewise
+        C, W, grid = self.C, self.gmap.W, self.gmap.grid
+        kind, cr, cc = key
+        for a, b in self._borders.get(key, ()):
+            self._partner[a].remove(b); self._partner[b].remove(a)
+        if kind == 'v':
+            lo, x = cr * C, cc * C
+            run = (grid[lo:lo + C, x - 1] == 0) & (grid[lo:lo + C, x] == 0)
+            cells = lambda i: ((lo + i) * W + x - 1, (lo + i) * W + x)
+        else:
+            lo, y = cc * C, cr * C
+            run = (grid[y - 1, lo:lo + C] == 0) & (grid[y, lo:lo + C] == 0)
+            cells = lambda i: ((y - 1) * W + lo + i, y * W + lo + i)
+        edge = np.diff(np.concatenate(([0], run.view(np.int8), [0])))
+        pairs = []
+        for s, e in zip(np.flatnonzero(edge == 1), np.flatnonzero(edge == -1) - 1):
+            picks = ((s + e) // 2,) if e - s + 1 < 6 else (s, e)
+            for i in picks:
+                a, b = cells(int(i))
+                pairs.append((a, b))
+                self._partner.setdefault(a, []).append(b)
+                self._partner.setdefault(b, []).append(a)
+        self._borders[key] = pairs
+
+    def _collect(self, k):
+        cid = self._cv
+        nodes = set()
+        for key in self._cluster_borders(k):
+            for a, b in self._borders[key]: nodes.add(a if cid[a] == k else b)
+        self._nodes[k] = nodes
+
+    def _local(self, src, k, targets=None):
+        # BFS from src inside cluster k: {cell: dist}, and the parent links
+        nv, cid = self.gmap._nv, self._cv
+        dist, parent = {src: 0}, {src: -1}
+        layer, d = [src], 0
+        while layer:
+            d += 1
+            nxt = []
+            for cur in layer:
+                if targets is not None and cur in targets: return dist, parent
+                for j in range(cur * 4, cur * 4 + 4):
+                    nb = nv[j]
+                    if nb >= 0 and nb not in dist and cid[nb] == k:
+                        dist[nb] = d; parent[nb] = cur
+                        nxt.append(nb)
+            layer = nxt
+        return dist, parent
+
+    def _fill(self, ks):
+        # Node-to-node distances inside each cluster of ks
+        C, W = self.C, self.gmap.W
+        ks = np.fromiter(ks, dtype=np.int64)
+        free = np.zeros((self.CH * C, self.CW * C), dtype=bool)
+        free[:self.gmap.H, :W] = self.gmap.grid == 0
+        cr, cc = np.divmod(ks, self.CW)
+        span = np.arange(C)
+        keep = free[(cr[:, None] * C + span)[:, :, None], (cc[:, None] * C + span)[:, None, :]]
+        keep = np.where(keep, ~np.uint64(0), np.uint64(0))
+        names, blk, bit = [], [], []
+        for m, k in enumerate(ks.tolist()):
+            nodes = sorted(self._nodes[k])
+            if len(nodes) > 64:
+                self._intra[k] = self._slow_table(k, nodes); continue
+            names.append((k, nodes))
+            blk.extend([m] * len(nodes)); bit.extend(range(len(nodes)))
+        cells = np.array([a for _, nodes in names for a in nodes], dtype=np.int64)
+        blk, bit = np.array(blk, dtype=np.int64), np.array(bit, dtype=np.uint64)
+        lr, lc = np.divmod(cells, W)
+        lr %= C; lc %= C
+        reached = np.zeros(keep.shape, dtype=np.uint64)
+        reached[blk, lr, lc] = np.uint64(1) << bit
+        dist = np.full((len(cells), 64), -1, dtype=np.int32)
+        dist[np.arange(len(cells)), bit.astype(np.int64)] = 0
+        shifts = np.arange(64, dtype=np.uint64)
+        step = 0
+        while True:
+            step += 1
+            grow = reached.copy()
+            grow[:, 1:] |= reached[:, :-1]; grow[:, :-1] |= reached[:, 1:]
+            grow[:, :, 1:] |= reached[:, :, :-1]; grow[:, :, :-1] |= reached[:, :, 1:]
+            new = grow & keep & ~reached
+            if not new.any(): break
+            reached |= new
+            got = new[blk, lr, lc]
+            rows = np.flatnonzero(got)
+            hit = ((got[rows, None] >> shifts) & np.uint64(1)).astype(bool)
+            dist[rows[:, None].repeat(64, 1)[hit], np.nonzero(hit)[1]] = step
+        # dist[i, j]: from node j of its cluster to node i
+        i = 0
+        for k, nodes in names:
+            d = dist[i:i + len(nodes), :len(nodes)].tolist()
+            self._intra[k] = {a: [(b, d[q][p]) for q, b in enumerate(nodes) if q != p and d[q][p] >= 0]
+                              for p, a in enumerate(nodes)}
+            i += len(nodes)
+
+    def _slow_table(self, k, nodes):
+        table = {}
+        for a in nodes:
+            dist, _ = self._local(a, k)
+            table[a] = [(b, dist[b]) for b in nodes if b != a and b in dist]
+        return table
+
+    def sync(self):
+        # Rebuild around cells changed since the last query (no-op if none)
+        if self.gmap.version == self._version: return
+        grid = self.gmap.grid
+        changed = np.flatnonzero((grid != self._snap).reshape(-1))
+        self._snap = grid.copy()
+        self._version = self.gmap.version
+        dirty = set(self._cid[changed].tolist())
+        borders = {key for k in dirty for key in self._cluster_borders(k)}
+        for key in borders: self._set_border(key)
+        touched = set(dirty)
+        for kind, cr, cc in borders:
+            touched.add(cr * self.CW + cc)
+            touched.add((cr - (kind == 'h')) * self.CW + cc - (kind == 'v'))
+        for k in touched: self._collect(k)
+        self._fill(touched)
+        self.rebuilt += len(touched)
+
+    # --- Queries ---
+    def astar(self, start, goal):
+        # Drop-in for GridMap.astar: a Path from start to goal, or None
+        self.sync()
+        gmap, cid = self.gmap, self._cv
+        W = gmap.W
+        s, t = gmap.index(start), gmap.index(goal)
+        self.expanded = 0
+        if gmap.grid[goal] and s != t: return None
+        gr, gc = goal
+        if abs(start[0] - gr) + abs(start[1] - gc) <= self.C:
+            # Close by: a flat search is small, and the abstract graph would
+            # detour through an entrance when the two sit across a border
+            return gmap.jps(start, goal)
+        ks, kt = cid[s], cid[t]
+        # Link start and goal to the entrance nodes of their clusters (and to
+        # each other when they share one; leaving it may still be shorter)
+        sdist, sparent = self._local(s, ks)
+        tdist, tparent = self._local(t, kt)
+        into_t = {n: tdist[n] for n in self._nodes[kt] if n in tdist}
+        if t in sdist: into_t[s] = sdist[t]
+        # Abstract A*, ties in f to the deeper node as in GridMap.jps
+        g, came = {s: 0}, {s: -1}
+        open_set = [(abs(start[0] - gr) + abs(start[1] - gc), 0, s)]
+        expanded = 0
+        while open_set:
+            _, d, cur = heapq.heappop(open_set)
+            d = -d
+            if d > g[cur]: continue
+            expanded += 1
+            if cur == t: break
+            hops = [(n, 1) for n in self._partner.get(cur, ())]
+            if cur == s: hops += [(n, sdist[n]) for n in self._nodes[ks] if n in sdist]
+            else: hops += self._intra[cid[cur]].get(cur, [])
+            if cur in into_t: hops.append((t, into_t[cur]))
+            for nb, w in hops:
+                nd = d + w
+                if nd < g.get(nb, nd + 1):
+                    g[nb] = nd; came[nb] = cur
+                    r, c = divmod(nb, W)
+                    heapq.heappush(open_set, (nd + abs(r - gr) + abs(c - gc), -nd, nb))
+        self.expanded = expanded
+        if t not in came:
+            # A free start reaches an entrance of every border run it can
+            # cross, so the abstract graph misses nothing. A blocked start (a
+            # wall spawn) may only step off across the border beside it: flat
+            return gmap.jps(start, goal) if gmap.grid[start] else None
+        stops = [t]
+        while came[stops[-1]] >= 0: stops.append(came[stops[-1]])
+        stops.reverse()
+        # Refine: crossings are adjacent cells, every other hop stays in one
+        # cluster and is read off a local BFS
+        out = array('i', [s])
+        for a, b in zip(stops, stops[1:]):
+            if cid[a] != cid[b]: out.append(b)
+            elif a == s: self._trace(b, sparent, out)
+            elif b == t:
+                i = tparent[a]  # tparent grows from the goal, so walk it forwards
+                while i >= 0: out.append(i); i = tparent[i]
+            else: self._trace(b, self._local(a, cid[a], {b})[1], out)
+        return Path(out, W)
+
+    def _trace(self, b, parent, out):
+        # Append the cells after the BFS root up to b
+        leg = []
+        while parent[b] >= 0: leg.append(b); b = parent[b]
+        out.extend(reversed(leg))
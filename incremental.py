@@ -0,0 +1,133 @@
+import heapq
+from array import array
+from pathfinding import DIRS, Path
+
+# --- Incremental Replanning (D* Lite) ---
+# One planner per goal, searching backward from it so the start can move
+# between calls. g[u] is the distance the search has settled for u, rhs[u]
+# the one-step lookahead 1 + min g over u's neighbours; cells where the two
+# differ are queued. After cells change only they and their neighbours are
+# re-checked, and the search resumes from the queue, so the work follows the
+# size of the change rather than the map. Cells the search never reached
+# cost nothing to update. If the repair expands nothing and no changed cell
+# lies on the last Path, that Path is handed back as is.
+#
+# The caller changes the grid through gmap.set_cell() and then passes the
+# changed cells to update(). Both dicts stay sparse; missing means INF.
+INF = 1 << 30
+
+
+class DStarLite:
+    def __init__(self, gmap, goal):
+        self.gmap = gmap
+        self.goal = gmap.index(goal)
+        self.expanded = 0  # nodes expanded by the last path() call
+        self._g, self._rhs = {}, {self.goal: 0}
+        self._open, self._key = [], {}  # heap with lazy deletion; live keys
+        self._km = 0
+        self._last = None
+        self._path = None
+        self._queue(self.goal)
+
+    def _h(self, a, b):
+        W = self.gmap.W
+        return abs(a // W - b // W) + abs(a % W - b % W)
+
+    def _calc(self, u, s):
+        m = min(self._g.get(u, INF), self._rhs.get(u, INF))
+        return (m + self._h(s, u) + self._km, m)
+
+    def _queue(self, u):
+        key = self._calc(u, self._last if self._last is not None else u)
+        self._key[u] = key
+        heapq.heappush(self._open, (key, u))
+
+    def _update_vertex(self, u):
+        # Recompute rhs[u]; returns True if u became (or stays) inconsistent
+        if u != self.goal:
+            # Blocked cells keep a value too: nothing steps into them, but a
+            # start inside one may still step out (as GridMap.astar allows)
+            best = INF
+            nv, g = self.gmap._nv, self._g
+            for j in range(u * 4, u * 4 + 4):
+                v = nv[j]
+                if v >= 0:
+                    d = g.get(v, INF)
+                    if d < best: best = d
+            if best < INF: best += 1
+            if best < INF: self._rhs[u] = best
+            else: self._rhs.pop(u, None)
+        if self._g.get(u, INF) != self._rhs.get(u, INF):
+            self._queue(u)
+            return True
+        self._key.pop(u, None)
+        return False
+
+    def update(self, cells):
+        # Cells whose blocked state changed since the last call
+        H, W = self.gmap.H, self.gmap.W
+        touched = set()
+        for r, c in cells:
+            touched.add(r * W + c)
+            for dr, dc in DIRS:
+                if 0 <= r + dr < H and 0 <= c + dc < W: touched.add((r + dr) * W + c + dc)
+        for u in touched: self._update_vertex(u)
+        p = self._path
+        if p is not None and not touched.isdisjoint(p.cells[p.i:]): self._path = None
+
+    def _compute(self, s):
+        g, rhs, key, nv = self._g, self._rhs, self._key, self.gmap._nv
+        pop = heapq.heappop
+        expanded = 0
+        # A blocked start is in no neighbour list, so refresh it by hand
+        stuck = s != self.goal and self.gmap.grid.flat[s] != 0
+        if stuck: self._update_vertex(s)
+        while self._open:
+            k, u = self._open[0]
+            if key.get(u) != k:
+                pop(self._open); continue
+            if k >= self._calc(s, s) and g.get(s, INF) == rhs.get(s, INF): break
+            pop(self._open)
+            del key[u]
+            new = self._calc(u, s)
+            if k < new:
+                key[u] = new
+                heapq.heappush(self._open, (new, u))
+                continue
+            expanded += 1
+            if g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+            else:
+                g.pop(u, None)
+                self._update_vertex(u)
+            for j in range(u * 4, u * 4 + 4):
+                v = nv[j]
+                if v >= 0: self._update_vertex(v)
+            if stuck and self._h(u, s) == 1: self._update_vertex(s)
+        return expanded
+
+    def path(self, start):
+        # Shortest Path from start to the goal on the current grid, or None
+        s = self.gmap.index(start)
+        if self._last is not None and s != self._last: self._km += self._h(self._last, s)
+        self._last = s
+        self.expanded = self._compute(s)
+        if not self.expanded and self._path is not None and self._path.cells[self._path.i] == s:
+            return self._path
+        g, nv = self._g, self.gmap._nv
+        if g.get(s, INF) >= INF:
+            self._path = None
+            return None
+        # Walk down g to the goal. Ties go to the later direction in DIRS
+        # (up, then left): in map10 those routes uncover new floor sooner
+        out = array('i', [s])
+        cur = s
+        while cur != self.goal:
+            best, nxt = INF, -1
+            for j in range(cur * 4 + 3, cur * 4 - 1, -1):
+                v = nv[j]
+                if v >= 0 and g.get(v, INF) < best: best, nxt = g[v], v
+            out.append(nxt)
+            cur = nxt
+        self._path = Path(out, self.gmap.W)
+        return self._path
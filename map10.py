@@ -1,85 +1,113 @@
-import numpy as np
 import random
-from collections import deque
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-
-# (Include BFS helper)
-def bfs(start, goals, H, W, grid):
-    q = deque([start]); parent = {start: None}; visited = {start}
-    while q:
-        cur = q.popleft()
-        if cur in goals:
-            path = []; 
-            while cur: path.append(cur); cur = parent[cur]
-            return path[::-1]
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0 and (nr,nc) not in visited:
-                visited.add((nr,nc)); parent[(nr,nc)]=cur; q.append((nr,nc))
-    return None
-
-H, W = 18, 18
-real_grid = np.zeros((H, W), dtype=int)
-random.seed(31)
-for r in range(H):
-    for c in range(W): 
-        if random.random() < 0.06: real_grid[r, c] = 1
-
-agents = [{'pos':p, 'path':[], 'id':i} for i, p in enumerate([(1,1), (1,W-2), (H-2,1)])]
-explored = set(a['pos'] for a in agents)
-unexplored = {(r, c) for r in range(H) for c in range(W) if real_grid[r, c] == 0} - explored
-
-# Partition columns
-cols_per = W // 3
-regions = [set() for _ in range(3)]
-for (r, c) in unexplored:
-    idx = min(c // cols_per, 2)
-    regions[idx].add((r, c))
-
-frames = []
-for _ in range(600):
-    if not any(regions): break
-    
-    for i, a in enumerate(agents):
-        reg = regions[i]
-        if not a['path'] and reg:
-            target = min(reg, key=lambda x: abs(x[0]-a['pos'][0]) + abs(x[1]-a['pos'][1]))
-            path = bfs(a['pos'], {target}, H, W, real_grid)
-            if path: a['path'] = path
-        
-        if a['path']:
-            if len(a['path']) > 1: a['path'].pop(0); a['pos'] = a['path'][0]
-        
-        if a['pos'] in reg:
-            reg.remove(a['pos'])
-            explored.add(a['pos'])
-
-    frames.append({'agents': [a['pos'] for a in agents], 'explored': list(explored)})
-
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('black')
-
-def render(frame):
-    ax.clear(); ax.axis('off')
-    data = frames[frame]
-    
+import numpy as np
+from episodelog import EpisodeWriter
+from exploration import FREE, OccupancyMap, assign_frontiers, frontier_clusters, reachable
+from incremental import DStarLite
+from pathfinding import GridMap
+from recorder import FrameRecorder
+from world import make_grid, spawn
+
+COLORS = ['#FF1744', '#00E5FF', '#76FF03']
+
+def run(seed=31, H=18, W=18, n_agents=3, density=0.06, sensor=2, max_steps=600, log=None):
+    # A sensor that sees nothing never reveals the floor agents would move onto
+    if sensor < 1: raise ValueError(f"sensor must be at least 1, got {sensor}")
+    rng = random.Random(seed)
+    real_grid = make_grid(rng, H, W, density)
+
+    starts = spawn(rng, real_grid, n_agents, [(1,1), (1,W-2), (H-2,1)])
+    agents = [{'pos':p, 'path':None, 'plan':None, 'target':None, 'id':i} for i, p in enumerate(starts)]
+
+    # Agents only know what their sensors have shown; unknown cells are planned as walls
+    occ = OccupancyMap(real_grid, radius=sensor)
+    gmap = GridMap(np.ones((H, W), dtype=int))
+    frames = FrameRecorder(starts, sink=EpisodeWriter(log, real_grid) if log else None, explored=(), walls=())
+    opened = []  # floor revealed since routes were last repaired
+
+    def sense(pos):
+        for i in occ.reveal(pos).tolist():
+            cell = gmap.cell(i)
+            if occ.known[cell] == FREE:
+                gmap.set_cell(cell, 0)
+                opened.append(cell)
+                frames.add('explored', cell)
+            else:
+                frames.add('walls', cell)
+
+    for a in agents: sense(a['pos'])
+    frames.commit(starts)
+
+    for _ in range(max_steps):
+        if not occ.frontier: break
+
+        # Agents whose frontier has been mapped meanwhile pick a new cluster
+        idle = [a for a in agents if a['target'] not in occ.frontier]
+        if idle:
+            # Clusters seen (e.g. through a diagonal gap) but out of everyone's reach are left out
+            reach = reachable(gmap, [a['pos'] for a in agents])
+            clusters = [cl for cl in frontier_clusters(occ.frontier, W) if reach[cl].any()]
+            busy = {a['target'] for a in agents if a['target'] in occ.frontier}
+            taken = {k for k, cl in enumerate(clusters) if busy.intersection(cl)}
+            targets = assign_frontiers(gmap, [a['pos'] for a in idle], clusters, taken)
+            for a, t in zip(idle, targets):
+                a['target'] = t
+                a['plan'] = DStarLite(gmap, gmap.cell(t)) if t is not None else None
+                a['path'] = a['plan'] and a['plan'].path(a['pos'])
+
+        # Done once nobody has anywhere left to go
+        if not any(a['target'] is not None or a['path'] for a in agents): break
+
+        # Newly mapped floor may open shortcuts: repair routes in place
+        if opened:
+            for a in agents:
+                if a['path']:
+                    a['plan'].update(opened)
+                    a['path'] = a['plan'].path(a['pos'])
+            opened.clear()
+
+        for a in agents:
+            if a['path']:
+                a['pos'] = a['path'].advance()
+                if not a['path'].remaining(): a['path'] = None
+            sense(a['pos'])
+
+        frames.commit([a['pos'] for a in agents])
+
+    frames.close()
+    return {'grid': real_grid, 'frames': frames, 'colors': [COLORS[i % len(COLORS)] for i in range(n_agents)],
+            'steps': len(frames), 'remaining': occ.unknown_free(), 'sensor': sensor}
+
+def animate(result):
+    from render import Board, xy
+
+    real_grid, frames, colors, sensor = result['grid'], result['frames'], result['colors'], result['sensor']
+    H, W = real_grid.shape
     # Fog of War: Start Black (0), Explored areas become Grey (1)
-    canvas = np.zeros((H, W, 3)) 
-    for (r, c) in data['explored']:
-        canvas[r, c] = [0.4, 0.4, 0.4] # Revealed floor
-    
-    # Walls are visible if explored? Let's assume we just see explored floor.
-    ax.imshow(canvas, extent=[0, W, H, 0])
-
-    for i, pos in enumerate(data['agents']):
-        color = ['#FF1744', '#00E5FF', '#76FF03'][i]
-        ax.scatter(pos[1], pos[0], c=color, s=150, edgecolors='white')
-        # Vision radius visual
-        ax.add_patch(plt.Circle((pos[1], pos[0]), 2, color=color, alpha=0.1))
-
-    ax.set_title(f"MAP EXPLORATION | Explored: {len(data['explored'])}", color='white')
-    ax.set_ylim(H-0.5, -0.5); ax.set_xlim(-0.5, W-0.5)
-
-anim = FuncAnimation(fig, render, frames=len(frames), interval=50, repeat=False)
-plt.show()
\ No newline at end of file
+    canvas = np.zeros((H, W, 3))
+    board = Board(canvas, 'black')
+    fog = board.track(board.image)
+    start = frames.positions(0)
+    agents = board.points(start, c=colors, s=150, edgecolors='white')
+    # Vision radius visual
+    rings = [board.circle(sensor, color=color, alpha=0.1) for color in colors]
+
+    def render(frame):
+        data = frames[frame]
+        canvas[:] = 0
+        if data['explored']:
+            r, c = np.array(data['explored']).T
+            canvas[r, c] = [0.4, 0.4, 0.4] # Revealed floor
+        if data['walls']:
+            r, c = np.array(data['walls']).T
+            canvas[r, c] = [0.15, 0.1, 0.1] # Walls seen by a sensor
+        fog.set_data(canvas)
+
+        agents.set_offsets(xy(data['agents']))
+        for ring, pos in zip(rings, data['agents']):
+            ring.set_center((pos[1], pos[0]))
+        board.title.set_text(f"MAP EXPLORATION | Explored: {len(data['explored'])}")
+
+    return board.play(render, len(frames), interval=50)
+
+if __name__ == '__main__':
+    animate(run())
@@ -0,0 +1,311 @@
+import heapq
+import time
+from array import array
+from fields import DistanceField, INF
+from pathfinding import Path
+
+# --- Space-Time Reservation Table ---
+# Hashed sets of reserved (t, cell) vertices and (t, from, to) moves. An agent
+# that has finished holds its goal cell from its arrival time on. The first
+# time step where nothing changes any more is `cap`; from then on the world is
+# static and searches can drop the time dimension.
+
+class ReservationTable:
+    def __init__(self):
+        self.vertex = set()
+        self.edge = set()
+        self.hold = {}   # cell -> time from which it is occupied for good
+        self.last = {}   # cell -> latest time it is reserved by anyone
+        self.cap = 0
+
+    def reserve(self, cells):
+        # Claim a route given as flat cells, one per time step
+        cells = list(cells)
+        for t, c in enumerate(cells):
+            self.vertex.add((t, c))
+            if self.last.get(c, -1) < t: self.last[c] = t
+        for t in range(len(cells) - 1):
+            if cells[t] != cells[t + 1]: self.edge.add((t, cells[t], cells[t + 1]))
+        end = len(cells) - 1
+        self.hold[cells[-1]] = min(self.hold.get(cells[-1], end), end)
+        self.cap = max(self.cap, end + 1)
+
+    # Single constraints, as added by CBS
+    def forbid_cell(self, t, c):
+        self.vertex.add((t, c))
+        if self.last.get(c, -1) < t: self.last[c] = t
+        self.cap = max(self.cap, t + 1)
+
+    def forbid_move(self, t, a, b):
+        # Stored as the opposing move, which is what blocked() looks up
+        self.edge.add((t, b, a))
+        self.cap = max(self.cap, t + 1)
+
+    def blocked(self, t, a, b):
+        # Can an agent not move a -> b between t and t + 1?
+        nt = t + 1
+        if (nt, b) in self.vertex or self.hold.get(b, INF) <= nt: return True
+        return a != b and (t, b, a) in self.edge   # head-on swap
+
+
+# --- Space-Time A* ---
+# States are (cell, t); actions are the four moves plus waiting. The heuristic
+# is the exact obstacle-aware distance to the goal, so only reservations cause
+# detours. Past `cap` waiting is pointless and states are keyed by cell alone.
+# A start on a blocked cell (a wall spawn) has no distance of its own; it steps
+# off onto a free neighbour, so its estimate is the best neighbour's plus one.
+def _start_h(gmap, hv, s):
+    if hv[s] != INF: return hv[s]
+    k = s * 4
+    d = min((hv[nb] for nb in gmap._nv[k:k + 4] if nb >= 0), default=INF)
+    return INF if d == INF else d + 1
+
+
+def st_astar(gmap, start, goal, table, h=None):
+    s, t_goal = gmap.index(start), gmap.index(goal)
+    if h is None: h = DistanceField(gmap, [goal]).dist
+    hv, nv = memoryview(h), gmap._nv
+    hs = _start_h(gmap, hv, s)
+    if hs == INF: return None
+    cap, blocked = table.cap, table.blocked
+    done_after = table.last.get(t_goal, -1)
+    g, parent = {(s, 0): 0}, {(s, 0): None}
+    open_set = [(max(hs, done_after + 1), 0, s)]
+    push, pop = heapq.heappush, heapq.heappop
+    expanded = 0
+    while open_set:
+        _, t, cur = pop(open_set)
+        t = -t
+        key = (cur, min(t, cap))
+        if g[key] < t: continue
+        expanded += 1
+        if cur == t_goal and t > done_after:
+            gmap.expanded = expanded
+            out = array('i')
+            while key is not None:
+                out.append(key[0]); key = parent[key]
+            out.reverse()
+            return Path(out, gmap.W)
+        nt = t + 1
+        k = cur * 4
+        moves = [nv[j] for j in range(k, k + 4)]
+        if t < cap: moves.append(cur)
+        for nb in moves:
+            if nb < 0 or hv[nb] == INF or blocked(t, cur, nb): continue
+            nkey = (nb, min(nt, cap))
+            old = g.get(nkey)
+            if old is None or nt < old:
+                g[nkey] = nt; parent[nkey] = key
+                # The goal cannot be kept before done_after + 1; ties go to the
+                # deeper node, which is closer to the goal
+                push(open_set, (max(nt + hv[nb], done_after + 1), -nt, nb))
+    gmap.expanded = expanded
+    return None
+
+
+# --- Prioritized Planning ---
+# Agents plan one after another, each avoiding the routes already reserved.
+# When an agent finds no route it moves to the front of the order and the
+# round is replanned, up to `rounds` times. Agents still without a route stay
+# at their start (reported as None); those are not guaranteed collision-free.
+def plan_prioritized(gmap, starts, goals, rounds=None):
+    n = len(starts)
+    h = [DistanceField(gmap, [g]).dist for g in goals]
+    order = list(range(n))
+    for _ in range(n if rounds is None else rounds):
+        table = ReservationTable()
+        paths = [None] * n
+        failed = []
+        for a in order:
+            path = st_astar(gmap, starts[a], goals[a], table, h[a])
+            table.reserve(path.cells if path else [gmap.index(starts[a])])
+            paths[a] = path
+            if path is None: failed.append(a)
+        if not failed: break
+        order = failed + [a for a in order if a not in failed]
+    return paths
+
+
+# --- Focal Space-Time Search ---
+# ECBS-style low level. Among routes no longer than `bound` it prefers the one
+# with the fewest conflicts against `avoid`, a conflict table built from the
+# other agents' current routes.
+def _avoid_table(routes, skip):
+    vert, edge, parked, horizon = {}, {}, {}, 0
+    for b, p in enumerate(routes):
+        if b == skip: continue
+        for t, c in enumerate(p): vert[(t, c)] = vert.get((t, c), 0) + 1
+        for t in range(len(p) - 1):
+            if p[t] != p[t + 1]: edge[(t, p[t], p[t + 1])] = edge.get((t, p[t], p[t + 1]), 0) + 1
+        parked[p[-1]] = min(parked.get(p[-1], INF), len(p))
+        horizon = max(horizon, len(p))
+    return vert, edge, parked, horizon
+
+
+def st_focal(gmap, start, goal, table, h, avoid, bound):
+    s, t_goal = gmap.index(start), gmap.index(goal)
+    hv, nv = memoryview(h), gmap._nv
+    hs = _start_h(gmap, hv, s)
+    if hs == INF: return None
+    vert, edge, parked, horizon = avoid
+    cap, blocked = max(table.cap, horizon), table.blocked
+    done_after = table.last.get(t_goal, -1)
+    best, parent = {(s, 0): (0, 0)}, {(s, 0): None}
+    open_set = [(0, max(hs, done_after + 1), 0, s)]
+    push, pop = heapq.heappush, heapq.heappop
+    expanded = 0
+    while open_set:
+        conf, _, t, cur = pop(open_set)
+        t = -t
+        key = (cur, min(t, cap))
+        if best[key] != (conf, t): continue
+        expanded += 1
+        if cur == t_goal and t > done_after:
+            gmap.expanded = expanded
+            out = array('i')
+            while key is not None:
+                out.append(key[0]); key = parent[key]
+            out.reverse()
+            return Path(out, gmap.W)
+        nt = t + 1
+        k = cur * 4
+        moves = [nv[j] for j in range(k, k + 4)]
+        if t < cap: moves.append(cur)
+        for nb in moves:
+            if nb < 0 or hv[nb] == INF or blocked(t, cur, nb): continue
+            f = max(nt + hv[nb], done_after + 1)
+            if f > bound: continue
+            c = conf + vert.get((nt, nb), 0) + (parked.get(nb, INF) <= nt)
+            if nb != cur: c += edge.get((t, nb, cur), 0)
+            nkey = (nb, min(nt, cap))
+            old = best.get(nkey)
+            if old is None or (c, nt) < old:
+                best[nkey] = (c, nt); parent[nkey] = key
+                push(open_set, (c, f, -nt, nb))
+    gmap.expanded = expanded
+    return None
+
+
+# --- Conflict-Based Search ---
+# High level: a constraint tree. Each node holds one route per agent planned
+# under that node's constraints; the first conflict between two agents splits
+# it into two children, each forbidding the conflict for one of them.
+#
+# Best-first on total cost with st_astar as the low level is optimal. After
+# `max_nodes` expansions (or `time_limit` seconds) the search switches to
+# ECBS-style focal mode: replanned agents use st_focal within w times their
+# lower bound, and among open nodes costing at most w times the lowest open
+# lower bound the one with the fewest conflicts is expanded, so the answer
+# stays within w of optimal. If that also runs out of budget, agents are
+# planned by plan_prioritized. `mode` tells which stage produced the answer.
+
+def _conflicts(routes):
+    # All vertex and swap conflicts, earliest first; routes are flat cell lists
+    out = []
+    T = max(len(p) for p in routes)
+    prev = [p[0] for p in routes]
+    for t in range(T):
+        cur = [p[t] if t < len(p) else p[-1] for p in routes]
+        seen = {}
+        for a, c in enumerate(cur):
+            if c in seen: out.append((t, 'v', seen[c], a, c))
+            else: seen[c] = a
+        if t:
+            moves = {}
+            for a, (u, v) in enumerate(zip(prev, cur)):
+                if u == v: continue
+                b = moves.get((v, u))
+                if b is not None: out.append((t, 'e', b, a, (v, u)))
+                moves[(u, v)] = a
+        prev = cur
+    return out
+
+
+class CBS:
+    def __init__(self, gmap, starts, goals, max_nodes=2000, time_limit=None, w=1.5):
+        self.gmap = gmap
+        self.starts, self.goals = list(starts), list(goals)
+        self.max_nodes, self.time_limit, self.w = max_nodes, time_limit, w
+        self._h = [DistanceField(gmap, [g]).dist for g in self.goals]
+        self.nodes = 0     # high-level nodes expanded
+        self.mode = None   # 'optimal', 'focal' or 'prioritized'
+        self.cost = None   # sum of route lengths (moves and waits before arrival)
+
+    def _plan(self, a, cons, routes=None):
+        # Returns (route cells, lower bound on the agent's cost) or None
+        table = ReservationTable()
+        for kind, t, x in cons:
+            if kind == 'v': table.forbid_cell(t, x)
+            else: table.forbid_move(t, *x)
+        start, goal, h = self.starts[a], self.goals[a], self._h[a]
+        if routes is not None:
+            s = self.gmap.index(start)
+            lb = max(_start_h(self.gmap, memoryview(h), s), table.last.get(self.gmap.index(goal), -1) + 1)
+            path = st_focal(self.gmap, start, goal, table, h, _avoid_table(routes, a), self.w * lb)
+            if path: return list(path.cells), lb
+        path = st_astar(self.gmap, start, goal, table, h)
+        return None if path is None else (list(path.cells), len(path) - 1)
+
+    def _node(self, cons, routes, lbs):
+        conflicts = _conflicts(routes)
+        self._ids += 1
+        node = {'cost': sum(len(p) - 1 for p in routes), 'lb': sum(lbs), 'lbs': lbs,
+                'cons': cons, 'routes': routes, 'conflicts': conflicts}
+        return (node['cost'], len(conflicts), self._ids, node)
+
+    def _children(self, node, focal):
+        t, kind, a, b, x = node['conflicts'][0]
+        if kind == 'v': splits = [(a, ('v', t, x)), (b, ('v', t, x))]
+        else:
+            u, v = x   # a moved u -> v while b moved v -> u, arriving at t
+            splits = [(a, ('e', t - 1, (u, v))), (b, ('e', t - 1, (v, u)))]
+        for agent, c in splits:
+            cons = dict(node['cons'])
+            cons[agent] = cons.get(agent, ()) + (c,)
+            res = self._plan(agent, cons[agent], node['routes'] if focal else None)
+            if res is None: continue
+            routes, lbs = list(node['routes']), list(node['lbs'])
+            routes[agent], lbs[agent] = res
+            yield self._node(cons, routes, lbs)
+
+    def _over_budget(self, limit, t0):
+        if self.nodes >= limit: return True
+        return self.time_limit is not None and time.perf_counter() - t0 > self.time_limit
+
+    def solve(self):
+        self._ids, self.nodes = 0, 0
+        t0 = time.perf_counter()
+        root = [self._plan(a, ()) for a in range(len(self.starts))]
+        if None in root: return self._fallback()
+        open_set = [self._node({}, [r for r, _ in root], [lb for _, lb in root])]
+
+        # Stage 1: optimal best-first search on (cost, conflicts)
+        self.mode = 'optimal'
+        while open_set and not self._over_budget(self.max_nodes, t0):
+            node = heapq.heappop(open_set)[3]
+            if not node['conflicts']: return self._result(node)
+            self.nodes += 1
+            for child in self._children(node, False): heapq.heappush(open_set, child)
+
+        # Stage 2: focal search, bounded by w times the lowest open lower bound
+        self.mode = 'focal'
+        while open_set and not self._over_budget(2 * self.max_nodes, t0):
+            bound = self.w * min(e[3]['lb'] for e in open_set)
+            k = min((i for i, e in enumerate(open_set) if e[0] <= bound),
+                    key=lambda i: (open_set[i][1], open_set[i][0], open_set[i][2]))
+            node = open_set[k][3]
+            open_set[k] = open_set[-1]; open_set.pop()
+            if not node['conflicts']: return self._result(node)
+            self.nodes += 1
+            open_set.extend(self._children(node, True))
+        return self._fallback()
+
+    def _result(self, node):
+        self.cost = node['cost']
+        return [Path(array('i', p), self.gmap.W) for p in node['routes']]
+
+    def _fallback(self):
+        self.mode = 'prioritized'
+        paths = plan_prioritized(self.gmap, self.starts, self.goals)
+        self.cost = sum(len(p) - 1 for p in paths if p)
+        return paths
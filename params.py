@@ -0,0 +1,13 @@
+import ast
+
+# --- Command-Line Values ---
+# Shared by the scripts that take run() keywords on the command line
+# (sweep.py, export.py).
+
+def parse_values(text):
+    # "0.02,0.05" -> [0.02, 0.05]; anything that is not a literal stays a string
+    out = []
+    for v in text.split(','):
+        try: out.append(ast.literal_eval(v))
+        except (ValueError, SyntaxError): out.append(v)
+    return out
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from functools import partial
+
+# --- LRU Path Cache ---
+# Sits in front of a GridMap search (`method`: astar, jps or bidir, or any
+# callable(start, goal) such as HierarchicalPlanner.astar). Entries
+# live in the generation of the grid they were planned on: any set_cell()
+# bumps gmap.version and the cache drops everything on its next lookup.
+# Memory is bounded by the total number of path cells held; the least
+# recently used routes are evicted first. many() looks up a whole batch and
+# plans the misses together, optionally on a planpool.PlanPool.
+
+_MISS = object()
+
+
+class PathCache:
+    def __init__(self, gmap, max_cells=1_000_000, method='astar'):
+        self.gmap = gmap
+        self.method = method
+        self._search = method if callable(method) else partial(gmap.search, method=method)
+        self.max_cells = max_cells
+        self.hits = self.misses = 0
+        self._paths = OrderedDict()  # (start, goal) -> Path, None if unreachable
+        self._cells = 0
+        self._version = gmap.version
+
+    def __len__(self):
+        return len(self._paths)
+
+    def clear(self):
+        self._paths.clear()
+        self._cells = 0
+
+    def _get(self, key):
+        if key not in self._paths: return _MISS
+        self._paths.move_to_end(key)
+        return self._paths[key]
+
+    def _check(self):
+        if self.gmap.version != self._version:
+            self.clear()
+            self._version = self.gmap.version
+
+    def _reversible(self, start, goal):
+        # A route is just as good backwards on a 4-connected uniform grid
+        # (only between free cells: a search may leave a blocked start)
+        return self.gmap.grid[start] == 0 and self.gmap.grid[goal] == 0
+
+    def _lookup(self, start, goal):
+        path = self._get((start, goal))
+        if path is _MISS and self._reversible(start, goal):
+            rev = self._get((goal, start))
+            if rev is not _MISS: path = rev and rev.reversed()
+        return path
+
+    def _store(self, key, path):
+        self._paths[key] = path
+        self._cells += len(path) if path else 1
+        while self._cells > self.max_cells and len(self._paths) > 1:
+            _, old = self._paths.popitem(last=False)
+            self._cells -= len(old) if old else 1
+
+    def astar(self, start, goal):
+        self._check()
+        path = self._lookup(start, goal)
+        if path is not _MISS:
+            self.hits += 1
+            # Each caller gets its own cursor over the shared cells
+            return path and path.copy()
+
+        self.misses += 1
+        path = self._search(start, goal)
+        self._store((start, goal), path)
+        return path and path.copy()
+
+    def many(self, queries, pool=None):
+        # astar() over a list of (start, goal): the misses are searched as one
+        # batch, on pool (a planpool.PlanPool running the same search) if given.
+        # Same routes and hit counts as calling astar() on each in turn
+        self._check()
+        queries = [(tuple(s), tuple(g)) for s, g in queries]
+        out = [self._lookup(*q) for q in queries]
+        todo = {}
+        for q, path in zip(queries, out):
+            if path is _MISS and q not in todo and not ((q[1], q[0]) in todo and self._reversible(*q)):
+                todo[q] = None
+        found = pool.paths(list(todo)) if pool is not None else [self._search(*q) for q in todo]
+        for q, path in zip(todo, found):
+            todo[q] = path
+            self._store(q, path)
+        self.misses += len(todo)
+        self.hits += len(queries) - len(todo)
+        for k, (q, path) in enumerate(zip(queries, out)):
+            if path is not _MISS: continue
+            if q in todo: path = todo[q]
+            else:
+                rev = todo[(q[1], q[0])]
+                path = rev and rev.reversed()
+            out[k] = path
+        return [path and path.copy() for path in out]
@@ -0,0 +1,325 @@
+import heapq
+from array import array
+import numpy as np
+
+# --- Grid Representation ---
+# Cells are flat indices (r * W + c). The 4-neighbour table is built once per
+# grid; blocked and out-of-bounds neighbours are stored as -1.
+DIRS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def _span(d, n):
+    # (source slice, destination slice) for a shift of d along an axis of length n
+    if d >= 0: return slice(0, n - d), slice(d, n)
+    return slice(-d, n), slice(0, n + d)
+
+
+class Path:
+    # A route stored as flat cell indices with a cursor at the agent's current
+    # cell. Advancing is O(1); several Paths may share one cells array.
+    __slots__ = ('cells', 'W', 'i')
+
+    def __init__(self, cells, W, i=0):
+        self.cells = cells
+        self.W = W
+        self.i = i
+
+    @classmethod
+    def from_cells(cls, cells, W):
+        return cls(array('i', (r * W + c for r, c in cells)), W)
+
+    @property
+    def pos(self):
+        return divmod(self.cells[self.i], self.W)
+
+    @property
+    def goal(self):
+        return divmod(self.cells[-1], self.W)
+
+    def advance(self):
+        # Step to the next cell (stays put at the end) and return the position
+        if self.i < len(self.cells) - 1: self.i += 1
+        return divmod(self.cells[self.i], self.W)
+
+    def remaining(self):
+        return len(self.cells) - 1 - self.i
+
+    def copy(self):
+        return Path(self.cells, self.W, self.i)
+
+    def reversed(self):
+        return Path(self.cells[self.i:][::-1], self.W)
+
+    # Sequence view of the cells from the cursor on, like the old lists after pop(0)
+    def __len__(self):
+        return len(self.cells) - self.i
+
+    def __getitem__(self, k):
+        if k < 0: k += len(self)
+        if not 0 <= k < len(self): raise IndexError(k)
+        return divmod(self.cells[self.i + k], self.W)
+
+    def __iter__(self):
+        W = self.W
+        for j in range(self.i, len(self.cells)): yield divmod(self.cells[j], W)
+
+
+class GridMap:
+    def __init__(self, grid):
+        self.grid = np.asarray(grid)
+        self.H, self.W = self.grid.shape
+        self.n = self.H * self.W
+        self.nbrs = np.full((self.n, 4), -1, dtype=np.int32)
+        # Search scratch space, preallocated once and reset with a vectorized fill
+        self._g = np.empty(self.n, dtype=np.int32)
+        self._parent = np.empty(self.n, dtype=np.int32)
+        self._h = np.empty(self.n, dtype=np.int32)  # backward side of bidir
+        self._child = np.empty(self.n, dtype=np.int32)
+        self._nv = memoryview(self.nbrs.reshape(-1))
+        self._gv = memoryview(self._g)
+        self._pv = memoryview(self._parent)
+        self._hv = memoryview(self._h)
+        self._cv = memoryview(self._child)
+        self.expanded = 0  # nodes expanded by the last search
+        self.version = 0   # bumped on every cell change so caches can invalidate
+        self._build()
+
+    def _build(self):
+        H, W = self.H, self.W
+        idx = np.arange(self.n, dtype=np.int32).reshape(H, W)
+        free = self.grid == 0
+        table = self.nbrs.reshape(H, W, 4)
+        for k, (dr, dc) in enumerate(DIRS):
+            (sr, dst_r), (sc, dst_c) = _span(dr, H), _span(dc, W)
+            table[sr, sc, k] = np.where(free[dst_r, dst_c], idx[dst_r, dst_c], -1)
+
+    def set_cell(self, pos, value):
+        # Change one cell and patch the neighbour entries that point at it
+        r, c = pos
+        if self.grid[r, c] == value: return
+        self.grid[r, c] = value
+        i = r * self.W + c
+        for k, (dr, dc) in enumerate(DIRS):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.H and 0 <= nc < self.W:
+                # k ^ 2 is the opposite direction in DIRS
+                self.nbrs[nr * self.W + nc, k ^ 2] = i if value == 0 else -1
+        self.version += 1
+
+    def index(self, pos):
+        return pos[0] * self.W + pos[1]
+
+    def cell(self, i):
+        return divmod(i, self.W)
+
+    def _trace(self, i):
+        parent = self._pv
+        out = array('i')
+        while i >= 0:
+            out.append(i)
+            i = parent[i]
+        out.reverse()
+        return Path(out, self.W)
+
+    # --- A* (single goal, Manhattan heuristic) ---
+    def astar(self, start, goal):
+        W = self.W
+        s, t = self.index(start), self.index(goal)
+        gr, gc = goal
+        g, parent, nv = self._gv, self._pv, self._nv
+        self._g.fill(-1)
+        g[s] = 0; parent[s] = -1
+        open_set = [(abs(start[0] - gr) + abs(start[1] - gc), 0, s)]
+        push, pop = heapq.heappush, heapq.heappop
+        expanded = 0
+        while open_set:
+            _, d, cur = pop(open_set)
+            if d > g[cur]: continue
+            expanded += 1
+            if cur == t:
+                self.expanded = expanded
+                return self._trace(t)
+            d += 1
+            k = cur * 4
+            for j in range(k, k + 4):
+                nb = nv[j]
+                if nb >= 0:
+                    old = g[nb]
+                    if old < 0 or d < old:
+                        g[nb] = d; parent[nb] = cur
+                        r, c = divmod(nb, W)
+                        push(open_set, (d + abs(r - gr) + abs(c - gc), d, nb))
+        self.expanded = expanded
+        return None
+
+    def search(self, start, goal, method='astar'):
+        # Shortest path by algorithm name; all of them return the same length
+        if method not in SEARCHES: raise ValueError(f"unknown search {method!r}")
+        return getattr(self, method)(start, goal)
+
+    # --- Jump Point Search (single goal, 4-connected) ---
+    # Only jump points go on the heap. A horizontal run stops at the goal or
+    # at a forced neighbour: an open cell above or below whose counterpart one
+    # step back is a wall, so no earlier turn could have reached it. A vertical
+    # run stops wherever a horizontal run from that cell would find something.
+    # Every shortest path can be bent into one that turns only at such cells,
+    # so the length matches astar. Straight stretches are filled in on trace.
+    def _run(self, cur, d, t):
+        # Horizontal jump from cur in direction d (0 or 2); jump point or -1
+        nv = self._nv
+        while True:
+            nxt = nv[cur * 4 + d]
+            if nxt < 0: return -1
+            if nxt == t: return nxt
+            k = nxt * 4
+            if (nv[k + 1] >= 0 and nv[cur * 4 + 1] < 0) or (nv[k + 3] >= 0 and nv[cur * 4 + 3] < 0):
+                return nxt
+            cur = nxt
+
+    def _climb(self, cur, d, t):
+        # Vertical jump from cur in direction d (1 or 3); jump point or -1
+        nv = self._nv
+        while True:
+            cur = nv[cur * 4 + d]
+            if cur < 0 or cur == t: return cur
+            if self._run(cur, 0, t) >= 0 or self._run(cur, 2, t) >= 0: return cur
+
+    def jps(self, start, goal):
+        W = self.W
+        s, t = self.index(start), self.index(goal)
+        gr, gc = goal
+        g, parent, nv = self._gv, self._pv, self._nv
+        self._g.fill(-1)
+        g[s] = 0; parent[s] = -1
+        # Ties in f go to the deeper node (-d), which on open floors heads
+        # straight for the goal instead of widening the search
+        open_set = [(abs(start[0] - gr) + abs(start[1] - gc), 0, s, -1)]
+        push, pop = heapq.heappush, heapq.heappop
+        expanded = 0
+        while open_set:
+            _, d, cur, came = pop(open_set)
+            d = -d
+            if d > g[cur]: continue
+            expanded += 1
+            if cur == t:
+                self.expanded = expanded
+                return self._trace_jumps(t)
+            if came < 0: dirs = (0, 1, 2, 3)
+            elif came & 1: dirs = (came, 0, 2)
+            else:
+                back = cur - 1 if came == 0 else cur + 1  # may be a blocked start
+                dirs = [came] + [k for k in (1, 3) if nv[cur * 4 + k] >= 0 and nv[back * 4 + k] < 0]
+            r0, c0 = divmod(cur, W)
+            for k in dirs:
+                nb = self._climb(cur, k, t) if k & 1 else self._run(cur, k, t)
+                if nb < 0: continue
+                r, c = divmod(nb, W)
+                nd = d + abs(r - r0) + abs(c - c0)
+                old = g[nb]
+                if old < 0 or nd < old:
+                    g[nb] = nd; parent[nb] = cur
+                    push(open_set, (nd + abs(r - gr) + abs(c - gc), -nd, nb, k))
+        self.expanded = expanded
+        return None
+
+    def _trace_jumps(self, i):
+        # Like _trace, with the straight cells between jump points filled in
+        parent, W = self._pv, self.W
+        out = array('i', [i])
+        while parent[i] >= 0:
+            p = parent[i]
+            step = (W if p > i else -W) if abs(p - i) >= W else (1 if p > i else -1)
+            while i != p:
+                i += step
+                out.append(i)
+        out.reverse()
+        return Path(out, W)
+
+    # --- Bidirectional BFS (single goal) ---
+    # Grows whole BFS layers from both ends, always the smaller frontier first,
+    # and stops after the first layer where the two sides touch (the best
+    # meeting in that layer is a shortest path). Each side covers about half
+    # the radius, so roughly half the cells of a one-sided BFS.
+    def bidir(self, start, goal):
+        s, t = self.index(start), self.index(goal)
+        if s == t:
+            self.expanded = 1
+            return Path(array('i', [s]), self.W)
+        if self.grid[goal]: self.expanded = 0; return None
+        g, parent, h, child, nv = self._gv, self._pv, self._hv, self._cv, self._nv
+        self._g.fill(-1); self._h.fill(-1)
+        g[s] = 0; parent[s] = -1
+        h[t] = 0; child[t] = -1
+        fwd, bwd = [s], [t]
+        expanded = 0
+        while fwd and bwd:
+            forward = len(fwd) <= len(bwd)
+            mine, other, link = (g, h, parent) if forward else (h, g, child)
+            best, meet = None, None
+            nxt = []
+            for cur in (fwd if forward else bwd):
+                expanded += 1
+                d = mine[cur] + 1
+                k = cur * 4
+                for j in range(k, k + 4):
+                    nb = nv[j]
+                    if nb < 0: continue
+                    if other[nb] >= 0:
+                        if best is None or d + other[nb] < best:
+                            best, meet = d + other[nb], (cur, nb) if forward else (nb, cur)
+                    elif mine[nb] < 0:
+                        mine[nb] = d; link[nb] = cur
+                        nxt.append(nb)
+            if meet is not None:
+                self.expanded = expanded
+                a, b = meet
+                path = self._trace(a)
+                while b >= 0:
+                    path.cells.append(b)
+                    b = child[b]
+                return path
+            if forward: fwd = nxt
+            else: bwd = nxt
+        self.expanded = expanded
+        return None
+
+    # --- BFS (nearest of several goals) ---
+    def bfs(self, start, goals):
+        W = self.W
+        targets = {r * W + c for r, c in goals}
+        s = self.index(start)
+        g, parent, nv = self._gv, self._pv, self._nv
+        self._g.fill(-1)
+        g[s] = 0; parent[s] = -1
+        frontier = [s]
+        expanded = 0
+        while frontier:
+            nxt = []
+            for cur in frontier:
+                expanded += 1
+                if cur in targets:
+                    self.expanded = expanded
+                    return self._trace(cur)
+                k = cur * 4
+                for j in range(k, k + 4):
+                    nb = nv[j]
+                    if nb >= 0 and g[nb] < 0:
+                        g[nb] = 0; parent[nb] = cur
+                        nxt.append(nb)
+            frontier = nxt
+        self.expanded = expanded
+        return None
+
+
+SEARCHES = ('astar', 'jps', 'bidir')
+
+
+# --- Drop-in helpers with the old script signatures ---
+# These rebuild the neighbour table on every call; long-running code should
+# keep a GridMap around instead.
+def astar(start, goal, H, W, grid):
+    return GridMap(grid).astar(start, goal)
+
+
+def bfs(start, goals, H, W, grid):
+    return GridMap(grid).bfs(start, goals)
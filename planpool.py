@@ -0,0 +1,135 @@
+import os
+from multiprocessing import Pool, shared_memory
+import numpy as np
+from assignment import cost_matrix, lengths_from
+from pathfinding import SEARCHES, GridMap
+
+# --- Parallel Batch Planning ---
+# A PlanPool answers a whole tick's worth of planning at once on a pool of
+# worker processes: routes for a list of (start, goal) queries, and the
+# agents x tasks cost matrix that assignment matches on (assignment's own
+# cost_matrix, with its rows of path lengths computed on the pool).
+#
+# The grid lives in one shared-memory block. Workers map it at start-up and
+# keep their own GridMap over it, so a batch only ships cells out and routes
+# or distance rows back. Every batch carries the grid's generation: after a
+# set_cell() the next batch copies the grid into the block once, and each
+# worker rebuilds its neighbour table on the first task it sees from the new
+# generation.
+#
+# Each query is solved on its own by the same deterministic search and the
+# answers come back in query order, so results are identical for any number
+# of workers and to planning in-process. Batches smaller than min_batch (and
+# everything when workers is 1) are planned in-process, where the round trip
+# would cost more than the search. The pool and the block are only created
+# for the first batch that needs them; close() releases both.
+#
+#   planner = PlanPool(gmap, workers=4, method='jps')
+#   routes = planner.paths([(start, goal), ...])   # Path or None per query
+#   planner.close()
+#
+# Worker processes cannot start their own pools, so runs that are already on
+# a pool (sweep.py) should leave workers at 1.
+
+
+class PlanPool:
+    def __init__(self, gmap, workers=None, method='astar', min_batch=16):
+        if method not in SEARCHES: raise ValueError(f"unknown search {method!r}")
+        self.gmap = gmap
+        self.workers = workers or os.cpu_count()
+        self.method = method
+        self.min_batch = min_batch
+        self._pool = self._shm = self._grid = None
+        self._epoch = self._version = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        # Create the shared grid and the workers now (otherwise on first use)
+        if self._pool is not None: return
+        grid = self.gmap.grid
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, grid.nbytes))
+        self._grid = np.ndarray(grid.shape, grid.dtype, buffer=self._shm.buf)
+        self._pool = Pool(self.workers, _init, (self._shm.name, grid.shape, grid.dtype.str))
+
+    def close(self):
+        if self._pool is None: return
+        self._pool.close()
+        self._pool.join()
+        self._grid = None
+        self._shm.close()
+        self._shm.unlink()
+        self._pool = self._shm = None
+        self._epoch = self._version = -1
+
+    def _parallel(self, n):
+        return self.workers > 1 and n >= self.min_batch
+
+    def _sync(self):
+        # Publish the grid if it changed since the last batch. The version is
+        # read first: a change during the copy is picked up by the next batch
+        self.start()
+        version = self.gmap.version
+        if version != self._version:
+            self._grid[...] = self.gmap.grid
+            self._version = version
+            self._epoch += 1
+        return self._epoch
+
+    def _map(self, fn, items, extra):
+        # fn over items in chunks on the pool; results flattened in item order
+        epoch = self._sync()
+        size = -(-len(items) // (self.workers * 4))
+        tasks = [(epoch, items[a:a + size], *extra) for a in range(0, len(items), size)]
+        return [x for chunk in self._pool.map(fn, tasks) for x in chunk]
+
+    # --- Batches ---
+    def paths(self, queries):
+        # One Path (or None if unreachable) per (start, goal), in query order
+        queries = [(tuple(s), tuple(g)) for s, g in queries]
+        if not self._parallel(len(queries)):
+            return [self.gmap.search(s, g, self.method) for s, g in queries]
+        return self._map(_paths, queries, (self.method,))
+
+    def cost_matrix(self, agents, tasks):
+        # agents x tasks path lengths, INF where no path exists
+        return cost_matrix(self.gmap, agents, tasks, self._lengths)
+
+    def _lengths(self, sources, cells, inbound):
+        if not self._parallel(len(sources)): return lengths_from(self.gmap, sources, cells, inbound)
+        return self._map(_lengths, [tuple(s) for s in sources], (cells, inbound))
+
+
+# --- Worker side ---
+_shm = _grid = _gmap = None
+_epoch = -1
+
+
+def _init(name, shape, dtype):
+    global _shm, _grid
+    _shm = shared_memory.SharedMemory(name)
+    _grid = np.ndarray(shape, np.dtype(dtype), buffer=_shm.buf)
+
+
+def _map_for(epoch):
+    # This worker's GridMap, rebuilt when the parent has published a new grid
+    global _gmap, _epoch
+    if epoch != _epoch:
+        _gmap = GridMap(_grid)
+        _epoch = epoch
+    return _gmap
+
+
+def _paths(task):
+    epoch, queries, method = task
+    gmap = _map_for(epoch)
+    return [gmap.search(s, g, method) for s, g in queries]
+
+
+def _lengths(task):
+    epoch, sources, cells, inbound = task
+    return lengths_from(_map_for(epoch), sources, cells, inbound)
@@ -0,0 +1,80 @@
+import numpy as np
+
+# --- Struct-of-Arrays Agent Population ---
+# Every agent is a row across parallel NumPy arrays: flat cell position, flat
+# task cell (-1 for none) and a cursor/end pair into one shared route buffer.
+# Movement and arrival checks are single vectorized operations per tick, so
+# thousands of agents cost about as much Python as three.
+NO_TASK = -1
+
+
+class AgentPopulation:
+    def __init__(self, gmap, starts):
+        self.gmap = gmap
+        n = len(starts)
+        self.pos = np.array([gmap.index(p) for p in starts], dtype=np.int32)
+        self.task = np.full(n, NO_TASK, dtype=np.int32)
+        self.has_path = np.zeros(n, dtype=bool)
+        self.cur = np.zeros(n, dtype=np.int64)  # index of the current cell in _buf
+        self.end = np.zeros(n, dtype=np.int64)  # index of the last cell in _buf
+        self._buf = np.empty(max(1024, 16 * n), dtype=np.int32)
+        self._top = 0
+
+    def __len__(self):
+        return len(self.pos)
+
+    # --- Conversions ---
+    def cell(self, i):
+        return self.gmap.cell(int(self.pos[i]))
+
+    def positions(self):
+        r, c = np.divmod(self.pos, self.gmap.W)
+        return list(zip(r.tolist(), c.tolist()))
+
+    # --- Routes ---
+    def _compact(self, extra):
+        # Keep only the unvisited part of each live route, growing if still short
+        live = np.flatnonzero(self.has_path)
+        lens = self.end[live] - self.cur[live] + 1
+        total = int(lens.sum())
+        size = len(self._buf)
+        while size < 2 * (total + extra): size *= 2
+        new_start = np.cumsum(lens) - lens
+        gather = np.repeat(self.cur[live] - new_start, lens) + np.arange(total)
+        buf = np.empty(size, dtype=np.int32)
+        buf[:total] = self._buf[gather]
+        self._buf, self._top = buf, total
+        self.cur[live] = new_start
+        self.end[live] = new_start + lens - 1
+
+    def set_path(self, i, path):
+        cells = np.frombuffer(path.cells, dtype=np.int32)[path.i:]
+        if self._top + len(cells) > len(self._buf): self._compact(len(cells))
+        a = self._top
+        self._buf[a:a + len(cells)] = cells
+        self._top += len(cells)
+        self.cur[i], self.end[i] = a, a + len(cells) - 1
+        self.has_path[i] = True
+        self.pos[i] = cells[0]
+
+    def clear(self, idx):
+        # Drop task and route for the given agents
+        self.task[idx] = NO_TASK
+        self.has_path[idx] = False
+
+    def remaining(self):
+        return np.where(self.has_path, self.end - self.cur, 0)
+
+    # --- Per-tick batch operations ---
+    def idle(self):
+        return self.task == NO_TASK
+
+    def step(self):
+        # Advance every agent that still has route left; returns the movers mask
+        moving = self.has_path & (self.cur < self.end)
+        self.cur[moving] += 1
+        self.pos[moving] = self._buf[self.cur[moving]]
+        return moving
+
+    def arrived(self):
+        return (self.task != NO_TASK) & (self.pos == self.task)
@@ -0,0 +1,133 @@
+from bisect import bisect_right
+
+# --- Delta-Encoded Frame Recording ---
+# Instead of copying the world every tick, the recorder keeps:
+#   * one move stream per agent: (frame index, new position) whenever it moves
+#   * per-frame add/remove deltas for each named layer (items, fires, explored...)
+#   * occasional keyframes (full layer snapshots) so seeking stays cheap
+# A keyframe is only taken once the changes since the previous one outweigh a
+# full snapshot, which keeps total memory linear in the number of changes.
+# frames[i] rebuilds the same dict the scenarios used to append.
+#
+# An optional sink (e.g. episodelog.EpisodeWriter) is handed the starting
+# layers and then every committed frame as it happens; close() closes it.
+
+class FrameRecorder:
+    def __init__(self, agents, keyframe_every=64, sink=None, **layers):
+        self.keyframe_every = keyframe_every
+        self.sink = sink
+        self._start = list(agents)
+        self._pos = list(agents)
+        self._moves = [([], []) for _ in self._start]  # per agent: (frame indices, positions)
+        self._live = {k: set(v) for k, v in layers.items()}
+        self._pending = {k: (set(), set()) for k in layers}
+        self._deltas = []  # per frame: {layer: (added, removed)} or None
+        self._meta = []
+        self._keys = [-1]  # frame index of each keyframe; -1 is the initial state
+        self._snaps = [{k: frozenset(v) for k, v in self._live.items()}]
+        self._since_key = 0
+        self._key_size = sum(len(v) for v in self._live.values())
+        self._cursor = None  # (frame index, {layer: set}) of the last rebuilt frame
+        if sink is not None: sink.start(self._start, self._live)
+
+    # --- Recording ---
+    def add(self, layer, item):
+        live = self._live[layer]
+        if item in live: return
+        live.add(item)
+        added, removed = self._pending[layer]
+        if item in removed: removed.discard(item)
+        else: added.add(item)
+
+    def remove(self, layer, item):
+        live = self._live[layer]
+        if item not in live: return
+        live.discard(item)
+        added, removed = self._pending[layer]
+        if item in added: added.discard(item)
+        else: removed.add(item)
+
+    def commit(self, agents, **meta):
+        frame = len(self._deltas)
+        for j, p in enumerate(agents):
+            if p != self._pos[j]:
+                self._pos[j] = p
+                f, ps = self._moves[j]
+                f.append(frame); ps.append(p)
+
+        delta, changes = {}, 0
+        for k, (added, removed) in self._pending.items():
+            if added or removed:
+                delta[k] = (tuple(added), tuple(removed))
+                changes += len(added) + len(removed)
+                added.clear(); removed.clear()
+        self._deltas.append(delta or None)
+        self._meta.append(meta)
+        if self.sink is not None: self.sink.frame(agents, delta, meta)
+
+        self._since_key += changes
+        if frame - self._keys[-1] >= self.keyframe_every and self._since_key >= self._key_size:
+            self._keys.append(frame)
+            self._snaps.append({k: frozenset(v) for k, v in self._live.items()})
+            self._since_key = 0
+            self._key_size = sum(len(v) for v in self._live.values())
+
+    def close(self):
+        if self.sink is not None: self.sink.close()
+
+    # --- Playback ---
+    def __len__(self):
+        return len(self._deltas)
+
+    def positions(self, i):
+        out = []
+        for j, (f, ps) in enumerate(self._moves):
+            t = bisect_right(f, i)
+            out.append(ps[t-1] if t else self._start[j])
+        return out
+
+    def travelled(self):
+        # Cells moved per agent over the whole episode
+        out = []
+        for prev, (_, ps) in zip(self._start, self._moves):
+            d = 0
+            for p in ps:
+                d += abs(p[0] - prev[0]) + abs(p[1] - prev[1])
+                prev = p
+            out.append(d)
+        return out
+
+    def trail(self, i, j, n):
+        # Last n positions of agent j up to frame i (one entry per move)
+        f, ps = self._moves[j]
+        t = bisect_right(f, i)
+        if t >= n: return ps[t-n:t]
+        return ([self._start[j]] + ps[:t])[-n:]
+
+    def changes(self, i):
+        # {layer: (added, removed)} committed at frame i
+        return self._deltas[i] or {}
+
+    def layers(self, i):
+        slot = bisect_right(self._keys, i) - 1
+        k = self._keys[slot]
+        if self._cursor and k <= self._cursor[0] <= i:
+            frame, sets = self._cursor
+        else:
+            frame, sets = k, {name: set(s) for name, s in self._snaps[slot].items()}
+        for d in self._deltas[frame+1:i+1]:
+            if d is None: continue
+            for name, (added, removed) in d.items():
+                s = sets[name]
+                s.difference_update(removed)
+                s.update(added)
+        self._cursor = (i, sets)
+        return sets
+
+    def __getitem__(self, i):
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError(i)
+        frame = {'agents': self.positions(i)}
+        for name, s in self.layers(i).items(): frame[name] = list(s)
+        frame.update(self._meta[i])
+        return frame
@@ -0,0 +1,85 @@
+import numpy as np
+
+# --- Blitted Rendering ---
+# A Board draws the map image once and keeps one artist per thing on screen:
+# a scatter per layer, a line per trail, a patch per sensor ring. A frame only
+# moves them (set_offsets, set_data, ...) and FuncAnimation blits the changed
+# artists over the cached background, so playback cost follows the number of
+# markers rather than the size of the map.
+#
+# Blitting only repaints inside the axes, so the title lives there too: the
+# view gets a strip of headroom above the map and the title text sits in it.
+#
+#   board = Board(canvas, 'black')
+#   agents = board.points(frames.positions(0), c='#2962FF', s=180)
+#   def draw(i):
+#       agents.set_offsets(xy(frames.positions(i)))
+#       board.title.set_text(f"Step: {i}")
+#   board.play(draw, len(frames), interval=100)
+
+HEADROOM = 0.08  # title strip, as a share of the map height
+
+
+def xy(cells):
+    # [(r, c), ...] -> (k, 2) array of (x, y) for set_offsets
+    if not len(cells): return np.empty((0, 2))
+    return np.asarray(cells, dtype=float)[:, ::-1]
+
+
+class Board:
+    def __init__(self, canvas, face, alpha=None, **title):
+        import matplotlib.pyplot as plt
+        H, W = canvas.shape[:2]
+        self.fig, self.ax = plt.subplots(figsize=(6, 6))
+        self.fig.patch.set_facecolor(face)
+        ax = self.ax
+        ax.axis('off')
+        self.image = ax.imshow(canvas, extent=[0, W, H, 0], alpha=alpha)
+        ax.set_xlim(-0.5, W-0.5); ax.set_ylim(H-0.5, -0.5 - max(1.0, H * HEADROOM))
+        title.setdefault('color', 'white')
+        title.setdefault('fontsize', 'large')
+        self.title = ax.text(0.5, 1.0, '', transform=ax.transAxes, ha='center', va='top', **title)
+        self.artists = [self.title]
+
+    def track(self, artist):
+        # Redraw artist every frame (anything not tracked is background)
+        artist.set_animated(True)
+        self.artists.append(artist)
+        return artist
+
+    # --- Artists ---
+    def points(self, cells=(), **kw):
+        pts = xy(cells)
+        return self.track(self.ax.scatter(pts[:, 0], pts[:, 1], **kw))
+
+    def line(self, **kw):
+        return self.track(self.ax.plot([], [], **kw)[0])
+
+    def circle(self, radius, **kw):
+        from matplotlib.patches import Circle
+        return self.track(self.ax.add_patch(Circle((0, 0), radius, **kw)))
+
+    def label(self, text, **kw):
+        return self.track(self.ax.text(0, 0, text, **kw))
+
+    def gridlines(self, **kw):
+        # Cell borders as one static collection
+        from matplotlib.collections import LineCollection
+        H, W = self.image.get_array().shape[:2]
+        segs = [[(x - 0.5, -0.5), (x - 0.5, H - 0.5)] for x in range(W)]
+        segs += [[(-0.5, y - 0.5), (W - 0.5, y - 0.5)] for y in range(H)]
+        return self.ax.add_collection(LineCollection(segs, **kw))
+
+    # --- Playback ---
+    def animate(self, draw, frames, interval):
+        from matplotlib.animation import FuncAnimation
+        def step(i):
+            draw(i)
+            return self.artists
+        return FuncAnimation(self.fig, step, frames=frames, interval=interval, repeat=False, blit=True)
+
+    def play(self, draw, frames, interval):
+        import matplotlib.pyplot as plt
+        anim = self.animate(draw, frames, interval)
+        plt.show()
+        return anim
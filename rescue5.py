@@ -1,81 +1,73 @@
-import numpy as np
 import random
-from collections import deque
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import numpy as np
+from episodelog import EpisodeWriter
+from pathfinding import GridMap
+from recorder import FrameRecorder
+from sequencing import TourPlanner
+from world import make_grid, spawn
+
+def run(seed=3, H=15, W=15, n_agents=3, n_victims=6, density=0.1, max_steps=300, log=None):
+    rng = random.Random(seed)
+    grid = make_grid(rng, H, W, density)
+    gmap = GridMap(grid)
+
+    starts = spawn(rng, grid, n_agents, [(0,0), (0,W-1), (H-1,0)])
+    victims = set()
+    while len(victims) < n_victims:
+        p = (rng.randrange(H), rng.randrange(W))
+        if grid[p] == 0: victims.add(p)
 
-def bfs(start, goals, H, W, grid):
-    q = deque([start]); parent = {start: None}; visited = {start}
-    while q:
-        cur = q.popleft()
-        if cur in goals:
-            path = []; 
-            while cur: path.append(cur); cur = parent[cur]
-            return path[::-1]
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0 and (nr,nc) not in visited:
-                visited.add((nr,nc)); parent[(nr,nc)]=cur; q.append((nr,nc))
-    return None
+    # Victims are shared out between agents up front; every agent then visits
+    # its share in one sequenced tour
+    tours = TourPlanner(gmap)
+    agents = [{'pos':s, 'path':path if stops else None}
+              for s, (stops, path) in zip(starts, tours.plan(starts, sorted(victims)))]
 
-H, W = 15, 15
-grid = np.zeros((H, W), dtype=int)
-random.seed(3)
-for r in range(H):
-    for c in range(W): 
-        if random.random() < 0.1: grid[r, c] = 1
+    frames = FrameRecorder(starts, sink=EpisodeWriter(log, grid) if log else None, victims=victims)
 
-agents = [{'pos':s, 'path':[], 'hist':[s]} for s in [(0,0), (0,W-1), (H-1,0)]]
-victims = set()
-while len(victims) < 6:
-    p = (random.randrange(H), random.randrange(W))
-    if grid[p] == 0: victims.add(p)
+    def rescue(a):
+        if a['pos'] in victims:
+            victims.remove(a['pos']); frames.remove('victims', a['pos'])
 
-frames = []
-for _ in range(300):
-    if not victims: break
-    
-    for a in agents:
-        if not a['path'] and victims:
-            path = bfs(a['pos'], victims, H, W, grid)
-            if path: a['path'] = path
-        
-        if a['path']:
-            if len(a['path']) > 1: a['path'].pop(0); a['pos'] = a['path'][0]
-            a['hist'].append(a['pos'])
-            
-        if a['pos'] in victims: victims.remove(a['pos']); a['path'] = []
+    for a in agents: rescue(a)
+    for _ in range(max_steps):
+        # Done when everyone is saved or every tour is over (the rest are unreachable)
+        if not victims or all(not a['path'] for a in agents): break
 
-    frames.append({'agents': [a['pos'] for a in agents], 'victims': list(victims), 'trails': [list(a['hist']) for a in agents]})
+        for a in agents:
+            if a['path']:
+                a['pos'] = a['path'].advance()
+                if not a['path'].remaining(): a['path'] = None
+            rescue(a)
 
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('black')
+        frames.commit([a['pos'] for a in agents])
 
-def render(frame):
-    ax.clear(); ax.axis('off')
-    data = frames[frame]
-    
+    frames.close()
+    return {'grid': grid, 'frames': frames, 'steps': len(frames), 'remaining': len(victims)}
+
+def animate(result):
+    from render import Board, xy
+
+    grid, frames = result['grid'], result['frames']
+    H, W = grid.shape
     canvas = np.zeros((H, W, 3)) + 0.1
     canvas[grid==1] = [0.3, 0.3, 0.3]
-    ax.imshow(canvas, extent=[0, W, H, 0])
-    
-    # Victims
-    if data['victims']:
-        vy, vx = zip(*data['victims'])
-        ax.scatter(vx, vy, c='red', marker='P', s=150, edgecolors='white')
-
-    # Trails
-    for t in data['trails']:
-        if not t: continue
-        ty, tx = zip(*t[-10:])
-        ax.plot(tx, ty, c='#00E676', alpha=0.5, linewidth=2)
+    board = Board(canvas, 'black')
+    victims = board.points(c='red', marker='P', s=150, edgecolors='white')
+    n = len(frames.positions(0))
+    trails = [board.line(c='#00E676', alpha=0.5, linewidth=2) for _ in range(n)]
+    agents = board.points(frames.positions(0), c='#00E676', s=180, edgecolors='black')
 
-    # Agents
-    for pos in data['agents']:
-        ax.scatter(pos[1], pos[0], c='#00E676', s=180, edgecolors='black')
+    def render(frame):
+        data = frames[frame]
+        victims.set_offsets(xy(data['victims']))
+        for i, trail in enumerate(trails):
+            ty, tx = zip(*frames.trail(frame, i, 10))
+            trail.set_data(tx, ty)
+        agents.set_offsets(xy(data['agents']))
+        board.title.set_text(f"RESCUE SQUAD | Victims Left: {len(data['victims'])}")
 
-    ax.set_title(f"RESCUE SQUAD | Victims Left: {len(data['victims'])}", color='white')
-    ax.set_ylim(H-0.5, -0.5); ax.set_xlim(-0.5, W-0.5)
+    return board.play(render, len(frames), interval=100)
 
-anim = FuncAnimation(fig, render, frames=len(frames), interval=100, repeat=False)
-plt.show()
\ No newline at end of file
+if __name__ == '__main__':
+    animate(run())
@@ -1,79 +1,80 @@
-import numpy as np
 import random
-import heapq
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import numpy as np
+from assignment import assign
+from episodelog import EpisodeWriter
+from pathcache import PathCache
+from pathfinding import GridMap
+from planpool import PlanPool
+from population import AgentPopulation
+from recorder import FrameRecorder
+from world import make_grid, spawn
+
+def run(seed=13, H=14, W=14, n_agents=3, n_resources=12, density=0.07, max_steps=500, log=None, workers=1):
+    rng = random.Random(seed)
+    grid = make_grid(rng, H, W, density)
+    gmap = GridMap(grid)
+    paths = PathCache(gmap, method='jps')
+    planner = PlanPool(gmap, workers, method='jps')  # workers > 1: plan big batches on a process pool
 
-def astar(start, goal, H, W, grid):
-    def h(a, b): return abs(a[0]-b[0]) + abs(a[1]-b[1])
-    open_set = [(h(start, goal), 0, start, None)]; came = {}; g = {start: 0}
-    while open_set:
-        _, dist, cur, parent = heapq.heappop(open_set)
-        if cur == goal:
-            path = []; 
-            while cur: path.append(cur); cur = came.get(cur)
-            return path[::-1]
-        if cur in came and g.get(cur,float('inf'))<dist: continue
-        came[cur] = parent
-        for dr, dc in [(0,1),(1,0),(0,-1),(-1,0)]:
-            nr, nc = cur[0]+dr, cur[1]+dc
-            if 0<=nr<H and 0<=nc<W and grid[nr,nc]==0:
-                if dist+1 < g.get((nr,nc),float('inf')):
-                    g[(nr,nc)]=dist+1; heapq.heappush(open_set, (dist+1+h((nr,nc),goal), dist+1, (nr,nc), cur))
-    return None
+    starts = spawn(rng, grid, n_agents, [(0,0), (H-1,W-1), (H-1,0)])
+    agents = AgentPopulation(gmap, starts)
+    resources = [(rng.randint(1,H-2), rng.randint(1,W-2)) for _ in range(n_resources)]
+    queue = list(resources)
 
-H, W = 14, 14
-grid = np.zeros((H, W), dtype=int)
-random.seed(13)
-for r in range(H):
-    for c in range(W):
-        if random.random() < 0.07: grid[r, c] = 1
+    frames = FrameRecorder(starts, sink=EpisodeWriter(log, grid) if log else None, res=resources)
 
-agents = [{'pos':p, 'path':[], 'task':None} for p in [(0,0), (H-1,W-1), (H-1,0)]]
-resources = [(random.randint(1,H-2), random.randint(1,W-2)) for _ in range(12)]
-queue = list(resources)
+    for _ in range(max_steps):
+        # All idle agents take queued resources at once, matched by path length
+        idle = np.flatnonzero(agents.idle())
+        if len(idle) and queue:
+            here = [agents.cell(i) for i in idle]
+            picked = assign(planner.cost_matrix(here, queue))
+            routes = paths.many([(here[a], queue[t]) for a, t in picked], planner)
+            for (a, t), path in zip(picked, routes):
+                agents.task[idle[a]] = gmap.index(queue[t])
+                agents.set_path(idle[a], path)
+            for t in sorted((t for _, t in picked), reverse=True): del queue[t]
 
-frames = []
-max_steps = 500
+        # Done once no agent has a task (anything left is unreachable)
+        if agents.idle().all(): break
 
-for _ in range(max_steps):
-    if not queue and all(not a['task'] for a in agents): break
-    
-    for a in agents:
-        if not a['task'] and queue:
-            a['task'] = queue.pop(0)
-            path = astar(a['pos'], a['task'], H, W, grid)
-            if path: a['path'] = path
-        
-        if a['path']:
-            if len(a['path']) > 1: a['path'].pop(0); a['pos'] = a['path'][0]
-        
-        if a['pos'] == a['task']:
-            a['task'] = None
+        agents.step()
 
-    active_res = list(queue) + [a['task'] for a in agents if a['task']]
-    frames.append({'agents': [a['pos'] for a in agents], 'res': active_res})
+        done = np.flatnonzero(agents.arrived())
+        for i in done:
+            pos = agents.cell(i)
+            if pos not in queue: frames.remove('res', pos)
+        agents.clear(done)
 
-print(f"Simulation complete. Frames: {len(frames)}")
-fig, ax = plt.subplots(figsize=(6, 6))
-fig.patch.set_facecolor('#3E2723')
+        # Duplicate resource cells share one marker, so the count travels with the frame
+        remaining = len(queue) + int((~agents.idle()).sum())
+        frames.commit(agents.positions(), remaining=remaining)
 
-def render(frame):
-    ax.clear(); ax.axis('off')
-    data = frames[frame]
-    
+    frames.close()
+    planner.close()
+    return {'grid': grid, 'frames': frames, 'steps': len(frames), 'remaining': len(queue),
+            'cache': (paths.hits, paths.misses)}
+
+def animate(result):
+    from render import Board, xy
+
+    grid, frames = result['grid'], result['frames']
+    H, W = grid.shape
     canvas = np.zeros((H, W, 3)) + 0.2
     canvas[grid==1] = [0.1, 0.05, 0.05]
-    ax.imshow(canvas, extent=[0, W, H, 0])
+    board = Board(canvas, '#3E2723')
+    res = board.points(c='#FFD700', marker='h', s=150, edgecolors='orange')
+    agents = board.points(frames.positions(0), c='#CDDC39', s=180, edgecolors='black')
+
+    def render(frame):
+        data = frames[frame]
+        res.set_offsets(xy(data['res']))
+        agents.set_offsets(xy(data['agents']))
+        board.title.set_text(f"MINING BOTS | Remaining: {data['remaining']}")
 
-    for r in data['res']:
-        ax.scatter(r[1], r[0], c='#FFD700', marker='h', s=150, edgecolors='orange')
-    
-    for pos in data['agents']:
-        ax.scatter(pos[1], pos[0], c='#CDDC39', s=180, edgecolors='black')
-        
-    ax.set_title(f"MINING BOTS | Remaining: {len(data['res'])}", color='white')
-    ax.set_xlim(-0.5, W-0.5); ax.set_ylim(H-0.5, -0.5)
+    return board.play(render, len(frames), interval=100)
 
-anim = FuncAnimation(fig, render, frames=len(frames), interval=100, repeat=False)
-plt.show()
\ No newline at end of file
+if __name__ == '__main__':
+    result = run()
+    print(f"Simulation complete. Frames: {len(result['frames'])}")
+    animate(result)
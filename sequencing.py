@@ -0,0 +1,190 @@
+import time
+from array import array
+import numpy as np
+from fields import DistanceField, INF
+from pathfinding import Path
+
+# --- Route Sequencing ---
+# Orders an agent's goals into one open tour (start -> g1 -> g2 -> ...).
+# Construction is nearest-neighbour; 2-opt (reverse a stretch) and Or-opt
+# (move a run of 1-3 goals elsewhere, possibly flipped) then improve it until
+# no move helps. Every accepted move shortens the tour, so this always ends,
+# and the result depends only on the goals. A wall-clock budget can cap it
+# (deadline / time_budget), at the cost of tours that vary from run to run.
+# All moves read a matrix of true path lengths; index 0 is the start and
+# never moves.
+
+def nearest_neighbour(D):
+    n = len(D)
+    order, seen = [0], np.zeros(n, dtype=bool)
+    seen[0] = True
+    for _ in range(n - 1):
+        row = np.where(seen, np.inf, D[order[-1]])
+        j = int(row.argmin())
+        order.append(j); seen[j] = True
+    return order
+
+
+def _open(deadline):
+    return deadline is None or time.perf_counter() < deadline
+
+
+def _length(D, order):
+    return float(D[order[:-1], order[1:]].sum())
+
+
+def two_opt(D, order, deadline=None):
+    # Reverse order[i..j]; vectorized over j for each i
+    r = np.array(order)
+    n = len(r)
+    improved = True
+    while improved and _open(deadline):
+        improved = False
+        for i in range(1, n - 1):
+            j = np.arange(i + 1, n)
+            a, b = r[i - 1], r[i]
+            c = r[j]
+            d = np.append(r[j[:-1] + 1], -1)  # -1: j is the last stop
+            nxt = np.where(d >= 0, D[b, np.maximum(d, 0)] - D[c, np.maximum(d, 0)], 0)
+            delta = D[a, c] - D[a, b] + nxt
+            k = int(delta.argmin())
+            if delta[k] < -1e-9:
+                r[i:j[k] + 1] = r[i:j[k] + 1][::-1].copy()
+                improved = True
+    return r.tolist()
+
+
+def or_opt(D, order, deadline=None):
+    # Move a run of 1-3 stops between two others (or to the end), maybe flipped
+    r = list(order)
+    improved = True
+    while improved and _open(deadline):
+        improved = False
+        for L in (1, 2, 3):
+            i = 1
+            while i + L <= len(r) and _open(deadline):
+                seg = r[i:i + L]
+                p = r[i - 1]
+                q = r[i + L] if i + L < len(r) else None
+                gain = D[p, seg[0]] + (D[seg[-1], q] - D[p, q] if q is not None else 0)
+                rest = np.array(r[:i] + r[i + L:])
+                u = rest
+                v = np.append(rest[1:], -1)
+                vv = np.maximum(v, 0)
+                best = None
+                for s0, s1, flip in ((seg[0], seg[-1], False), (seg[-1], seg[0], True)):
+                    add = D[u, s0] + np.where(v >= 0, D[s1, vv] - D[u, vv], 0)
+                    k = int(add.argmin())
+                    if best is None or add[k] < best[0]: best = (add[k], k, flip)
+                add, k, flip = best
+                if add < gain - 1e-9:
+                    moved = seg[::-1] if flip else seg
+                    r = rest[:k + 1].tolist() + moved + rest[k + 1:].tolist()
+                    improved = True
+                else:
+                    i += 1
+    return r
+
+
+class TourPlanner:
+    # Holds one BFS field per goal ever seen, so distance matrices and the
+    # legs between stops are lookups rather than searches.
+    def __init__(self, gmap, time_budget=None):
+        self.gmap = gmap
+        self.time_budget = time_budget
+        self._fields = {}
+
+    def field(self, goal):
+        f = self._fields.get(goal)
+        if f is None: f = self._fields[goal] = DistanceField(self.gmap, [goal])
+        return f
+
+    def matrix(self, points):
+        # D[i, j] is the path length from points[i] to points[j]. As in
+        # assignment.path_lengths a point on a blocked cell (a wall spawn) can
+        # be left, onto its best free neighbour, but not reached
+        idx = np.fromiter((self.gmap.index(p) for p in points), dtype=np.int64, count=len(points))
+        stuck = np.flatnonzero(self.gmap.grid.reshape(-1)[idx] != 0)
+        nb = self.gmap.nbrs[idx[stuck]]
+        cols = []
+        for p in points:
+            dist = self.field(p).dist
+            col = dist[idx].astype(float)
+            step = np.where(nb >= 0, dist[np.maximum(nb, 0)], INF).min(axis=1)
+            col[stuck] = step + 1.0
+            cols.append(col)
+        D = np.stack(cols, axis=1)
+        D[D >= INF] = np.inf
+        D[stuck, stuck] = 0
+        return D
+
+    def _improve(self, D, order):
+        # Index 0 is the start. Tours never return to it, but the moves are
+        # scored as if D were symmetric, and a wall spawn cannot be reached
+        D = D.copy()
+        D[:, 0] = D[0]
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        while _open(deadline):
+            before = _length(D, order)
+            order = or_opt(D, two_opt(D, order, deadline), deadline)
+            if _length(D, order) >= before - 1e-9: break
+        return order
+
+    def order(self, start, goals):
+        # Reachable goals in tour order (unreachable ones are left out)
+        goals = list(dict.fromkeys(goals))
+        D = self.matrix([start] + goals)
+        keep = [0] + [j for j in range(1, len(D)) if D[0, j] < np.inf]
+        goals = [goals[j - 1] for j in keep[1:]]
+        if len(goals) < 2: return goals
+        D = D[np.ix_(keep, keep)]
+        order = self._improve(D, nearest_neighbour(D))
+        return [goals[k - 1] for k in order[1:]]
+
+    def route(self, start, stops):
+        # One Path through the stops, each leg descending that stop's field
+        out = array('i', [self.gmap.index(start)])
+        pos = start
+        if stops and self.gmap.grid[start]:
+            # A wall spawn first steps off onto the neighbour nearest the first stop
+            dist = self.field(stops[0]).dist
+            out.append(min((j for j in self.gmap.nbrs[out[0]].tolist() if j >= 0), key=lambda j: dist[j]))
+            pos = self.gmap.cell(out[-1])
+        for g in stops:
+            out.extend(self.gmap.index(p) for p in self.field(g).path(pos)[1:])
+            pos = g
+        return Path(out, self.gmap.W)
+
+    def plan(self, starts, goals):
+        # Split goals between agents and sequence each share. Goals are taken
+        # farthest-first and inserted where they lengthen the longest tour
+        # least (then where they add least), which keeps the tours balanced.
+        # Returns (stops, Path) per agent.
+        n = len(starts)
+        goals = list(dict.fromkeys(goals))
+        D = self.matrix(list(starts) + goals)
+        near = D[:n, n:].min(axis=0) if goals else np.zeros(0)
+        tours = [[k] for k in range(n)]
+        lengths = np.zeros(n)
+        for j in np.argsort(-near, kind='stable'):
+            if near[j] == np.inf: continue
+            g = n + int(j)
+            best = None
+            for k, t in enumerate(tours):
+                t = np.array(t)
+                # Insert after position i (the last slot appends)
+                inc = np.append(D[t[:-1], g] + D[g, t[1:]] - D[t[:-1], t[1:]], D[t[-1], g])
+                i = int(inc.argmin())
+                span = max(lengths[k] + inc[i], np.delete(lengths, k).max(initial=0))
+                key = (span, inc[i], k)
+                if inc[i] < np.inf and (best is None or key < best[0]): best = (key, k, i)
+            _, k, i = best
+            lengths[k] += best[0][1]
+            tours[k].insert(i + 1, g)
+        out = []
+        for k, s in enumerate(starts):
+            t = tours[k]
+            order = self._improve(D[np.ix_(t, t)], list(range(len(t)))) if len(t) > 2 else list(range(len(t)))
+            stops = [goals[t[m] - n] for m in order[1:]]
+            out.append((stops, self.route(s, stops)))
+        return out
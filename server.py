@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from assignment import assign
+from pathfinding import GridMap
+from planpool import PlanPool
+from population import NO_TASK, AgentPopulation
+from world import make_grid, spawn
+
+# --- Real-Time Simulation Server ---
+# A live world (agents, open tasks, obstacles) that an asyncio loop steps at
+# a fixed rate while clients change it. Clients speak newline-delimited JSON
+# over TCP, one object per line:
+#
+#   {"op": "task", "cell": [r, c]}                  a pickup for the nearest idle agent
+#   {"op": "obstacle", "cell": [r, c], "blocked": true}
+#   {"op": "snapshot"}                              the whole state, once
+#   {"op": "subscribe"}                             a snapshot, then every tick's delta
+#
+# Each op gets {"type": "ack", ...} or {"type": "error", "message": ...}. A
+# tick delta lists, in the order to replay them: tasks and obstacles added
+# and agents stopped by an obstacle (their task is open again) since the
+# last tick, then the tick's assignments, moves and finished tasks. Deltas
+# replayed over a snapshot reproduce the server's state.
+#
+# Ticks never wait on planning: matching idle agents to tasks and routing
+# them runs on an executor thread, one job at a time, and the results are
+# applied on the first tick after the job finishes (with workers > 1 a job
+# fans its distance fields and routes out to a planpool.PlanPool). Routes
+# that an obstacle has cut by then are dropped and planned again. Obstacles
+# also cut live routes: those agents stop and their tasks go back to open.
+# Cells with a task, open or taken, cannot be blocked.
+#
+# Every subscriber has a bounded queue of encoded deltas and its own writer
+# task that waits on the socket (drain). When a slow reader lets the queue
+# fill up, the backlog is dropped and the next message it gets is a fresh
+# snapshot, so the stream stays consistent and memory stays bounded.
+#
+#   python server.py --size 128 --agents 300 --port 8765
+
+RATE = 10.0  # ticks per second
+
+
+def _rows(grid):
+    return [''.join(map(str, row)) for row in grid.tolist()]
+
+
+class World:
+    def __init__(self, grid, starts, workers=1):
+        self.gmap = GridMap(np.array(grid, dtype=int))
+        self.pop = AgentPopulation(self.gmap, starts)
+        self.planner = PlanPool(self.gmap, workers, method='jps')
+        # Fork the workers now, before the executor and event loop threads exist
+        if workers > 1: self.planner.start()
+        self.tick = 0
+        self.open = set()  # task cells (flat) no agent has taken yet
+        self.dirty = True  # something a new planning job could use has changed
+        self._news = {'tasks': [], 'obstacles': [], 'stopped': []}  # since the last tick
+
+    def _cell(self, cell):
+        if not (isinstance(cell, (list, tuple)) and len(cell) == 2
+                and all(isinstance(v, int) and not isinstance(v, bool) for v in cell)):
+            raise ValueError(f"cell must be [row, col], got {cell!r}")
+        r, c = cell
+        if not (0 <= r < self.gmap.H and 0 <= c < self.gmap.W): raise ValueError(f"cell {[r, c]} is off the map")
+        return r, c
+
+    # --- Events ---
+    def add_task(self, cell):
+        r, c = self._cell(cell)
+        if self.gmap.grid[r, c]: raise ValueError(f"cell {[r, c]} is blocked")
+        i = self.gmap.index((r, c))
+        if i in self.open or i in self.pop.task: return False
+        self.open.add(i)
+        self._news['tasks'].append([r, c])
+        self.dirty = True
+        return True
+
+    def set_obstacle(self, cell, blocked):
+        r, c = self._cell(cell)
+        i = self.gmap.index((r, c))
+        # A task cell stays free until the task is done, whether or not it is taken
+        if blocked and (i in self.open or i in self.pop.task): raise ValueError(f"cell {[r, c]} has a task")
+        if bool(self.gmap.grid[r, c]) == blocked: return []
+        self.gmap.set_cell((r, c), int(blocked))
+        self._news['obstacles'].append([r, c, blocked])
+        self.dirty = True
+        if not blocked: return []
+        # Stop agents whose remaining route crosses the cell
+        pop = self.pop
+        cut = [k for k in np.flatnonzero(pop.has_path).tolist()
+               if (pop._buf[pop.cur[k] + 1:pop.end[k] + 1] == i).any()]
+        for k in cut:
+            if pop.task[k] != NO_TASK: self.open.add(int(pop.task[k]))
+        pop.clear(cut)
+        self._news['stopped'] += cut
+        return cut
+
+    # --- Planning (plan() runs off the event loop) ---
+    def jobs(self):
+        # (agents, task cells) for a planning job, or None if nothing to do
+        if not self.dirty: return None
+        self.dirty = False
+        idle = np.flatnonzero(self.pop.idle()).tolist()
+        if not idle or not self.open: return None
+        return idle, sorted(self.open)
+
+    def plan(self, idle, tasks):
+        # [(agent, task cell, Path)] for a matching of idle agents to tasks
+        gmap, pop = self.gmap, self.pop
+        starts = [gmap.cell(int(pop.pos[k])) for k in idle]
+        goals = [gmap.cell(t) for t in tasks]
+        picked = assign(self.planner.cost_matrix(starts, goals))
+        routes = self.planner.paths([(starts[a], goals[t]) for a, t in picked])
+        return [(idle[a], tasks[t], path) for (a, t), path in zip(picked, routes) if path is not None]
+
+    def apply(self, plans):
+        pop, grid = self.pop, self.gmap.grid.reshape(-1)
+        assigned = []
+        for k, t, path in plans:
+            cells = np.frombuffer(path.cells, dtype=np.int32)[path.i:]
+            if pop.task[k] != NO_TASK or t not in self.open or cells[0] != pop.pos[k]: continue
+            if grid[cells[1:]].any():
+                self.dirty = True  # cut by an obstacle while planning
+                continue
+            self.open.discard(t)
+            pop.task[k] = t
+            pop.set_path(k, path)
+            assigned.append([k, *self.gmap.cell(t)])
+        return assigned
+
+    # --- Ticks ---
+    def step(self, assigned=()):
+        pop = self.pop
+        moving = np.flatnonzero(pop.step())
+        done = np.flatnonzero(pop.arrived())
+        r, c = np.divmod(pop.pos[moving], self.gmap.W)
+        dr, dc = np.divmod(pop.task[done], self.gmap.W)
+        pop.clear(done)
+        if len(done): self.dirty = True
+        self.tick += 1
+        delta = {'type': 'tick', 'tick': self.tick,
+                 'moved': np.stack((moving, r, c), 1).tolist(),
+                 'assigned': list(assigned),
+                 'done': np.stack((dr, dc), 1).tolist(), **self._news}
+        self._news = {'tasks': [], 'obstacles': [], 'stopped': []}
+        return delta
+
+    def snapshot(self):
+        pop, W = self.pop, self.gmap.W
+        busy = np.flatnonzero(pop.task != NO_TASK)
+        return {'type': 'snapshot', 'tick': self.tick, 'grid': _rows(self.gmap.grid),
+                'agents': [list(p) for p in pop.positions()],
+                'assigned': [[int(k), *divmod(int(pop.task[k]), W)] for k in busy],
+                'tasks': [list(divmod(t, W)) for t in sorted(self.open)]}
+
+
+def _line(msg):
+    return (json.dumps(msg, separators=(',', ':')) + '\n').encode()
+
+
+class Subscriber:
+    def __init__(self, world, writer, limit):
+        self.world = world
+        self.writer = writer
+        self.queue = asyncio.Queue(limit)
+        self.resync = True   # next message is a snapshot
+        self.after = -1      # deltas up to this tick are in the last snapshot
+        self.dropped = 0
+
+    def offer(self, tick, data):
+        try: self.queue.put_nowait((tick, data))
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and start over from a snapshot
+            while not self.queue.empty(): self.queue.get_nowait()
+            self.dropped += 1
+            self.resync = True
+            self.queue.put_nowait(None)
+
+    async def pump(self):
+        while True:
+            if self.resync:
+                self.resync = False
+                snap = self.world.snapshot()
+                self.after = snap['tick']
+                self.writer.write(_line(snap))
+                await self.writer.drain()
+            item = await self.queue.get()
+            if item is None: continue
+            tick, data = item
+            if tick <= self.after: continue
+            self.writer.write(data)
+            await self.writer.drain()
+
+
+class SimServer:
+    def __init__(self, world, rate=RATE, queue=64, executor=None):
+        self.world = world
+        self.rate = rate
+        self.queue = queue
+        self.executor = executor or ThreadPoolExecutor(1)
+        self.subscribers = set()
+        self.ticks = 0
+        self.overruns = 0     # ticks that started late
+        self.busy = 0.0       # seconds spent inside ticks
+        self.worst = 0.0      # slowest tick
+        self._job = None
+        self._assigned = []
+
+    # --- Clients ---
+    async def handle(self, reader, writer):
+        sub = pump = None
+        try:
+            while line := await reader.readline():
+                try:
+                    msg = json.loads(line)
+                    if not isinstance(msg, dict): raise ValueError("message must be a JSON object")
+                    op = msg.get('op')
+                    if op == 'task': out = {'type': 'ack', 'op': op, 'ok': self.world.add_task(msg['cell'])}
+                    elif op == 'obstacle':
+                        stopped = self.world.set_obstacle(msg['cell'], bool(msg.get('blocked', True)))
+                        out = {'type': 'ack', 'op': op, 'stopped': stopped}
+                    elif op == 'snapshot': out = self.world.snapshot()
+                    elif op == 'subscribe':
+                        if sub is None:
+                            sub = Subscriber(self.world, writer, self.queue)
+                            self.subscribers.add(sub)
+                            pump = asyncio.create_task(sub.pump())
+                        continue
+                    else: raise ValueError(f"unknown op {op!r}")
+                except KeyError as e:
+                    out = {'type': 'error', 'message': f"missing field {e}"}
+                except (ValueError, TypeError) as e:
+                    out = {'type': 'error', 'message': str(e)}
+                writer.write(_line(out))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if sub is not None:
+                pump.cancel()
+                self.subscribers.discard(sub)
+            writer.close()
+
+    # --- World loop ---
+    def _plan(self, loop):
+        # Collect a finished job, then start the next one if there is work
+        if self._job is not None:
+            if not self._job.done(): return
+            self._assigned += self.world.apply(self._job.result())
+            self._job = None
+        work = self.world.jobs()
+        if work is not None: self._job = loop.run_in_executor(self.executor, self.world.plan, *work)
+
+    def tick(self, loop):
+        self._plan(loop)
+        delta = self.world.step(self._assigned)
+        self._assigned = []
+        data = _line(delta)
+        for sub in self.subscribers: sub.offer(delta['tick'], data)
+        return delta
+
+    async def run(self, ticks=None):
+        loop = asyncio.get_running_loop()
+        period = 1 / self.rate
+        due = loop.time()
+        while ticks is None or self.ticks < ticks:
+            t = time.perf_counter()
+            self.tick(loop)
+            spent = time.perf_counter() - t
+            self.ticks += 1
+            self.busy += spent
+            self.worst = max(self.worst, spent)
+            due += period
+            wait = due - loop.time()
+            if wait < 0:
+                self.overruns += 1
+                due = loop.time()  # skip ahead rather than burst to catch up
+            await asyncio.sleep(max(0.0, wait))
+
+    async def serve(self, host='127.0.0.1', port=8765, ticks=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await self.run(ticks)
+
+
+def make_world(seed=0, size=64, n_agents=100, density=0.1, workers=1):
+    rng = random.Random(seed)
+    grid = make_grid(rng, size, size, density)
+    return World(grid, spawn(rng, grid, n_agents, []), workers)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="Serve a live world over newline-delimited JSON")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--size', type=int, default=64, help="map is size x size")
+    ap.add_argument('--agents', type=int, default=100)
+    ap.add_argument('--density', type=float, default=0.1)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--rate', type=float, default=RATE, help="ticks per second")
+    ap.add_argument('--workers', type=int, default=1, help="processes for planning (default: plan in-process)")
+    args = ap.parse_args()
+
+    sim = SimServer(make_world(args.seed, args.size, args.agents, args.density, args.workers), args.rate)
+    print(f"serving {args.size}x{args.size}, {args.agents} agents at {args.rate:g} Hz on {args.host}:{args.port}")
+    try: asyncio.run(sim.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"{sim.ticks} ticks, {sim.overruns} late, worst {sim.worst * 1000:.1f} ms")
+    finally:
+        sim.world.planner.close()
@@ -0,0 +1,78 @@
+import math
+
+# --- Spatial Index for Target Sets ---
+# Bucket grid over (r, c) cells. Removal is O(1); nearest-k queries scan square
+# rings of buckets outward and stop once no unscanned bucket can hold anything
+# closer (Manhattan distance). Behaves like a set of cells for membership,
+# iteration and len().
+
+class SpatialIndex:
+    def __init__(self, H, W, items=(), cell=None):
+        items = list(items)
+        if cell is None:
+            # Roughly one item per bucket
+            cell = max(1, int(math.sqrt(H * W / max(len(items), 1))))
+        self.cell = cell
+        self.rows, self.cols = -(-H // cell), -(-W // cell)
+        self._buckets = {}
+        self._n = 0
+        for p in items: self.add(p)
+
+    def _key(self, p):
+        return (p[0] // self.cell, p[1] // self.cell)
+
+    def add(self, p):
+        b = self._buckets.setdefault(self._key(p), set())
+        if p not in b:
+            b.add(p); self._n += 1
+
+    def discard(self, p):
+        key = self._key(p)
+        b = self._buckets.get(key)
+        if b and p in b:
+            b.remove(p); self._n -= 1
+            if not b: del self._buckets[key]
+
+    def remove(self, p):
+        if p not in self: raise KeyError(p)
+        self.discard(p)
+
+    def __contains__(self, p):
+        b = self._buckets.get(self._key(p))
+        return b is not None and p in b
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for b in self._buckets.values(): yield from b
+
+    def _ring(self, br, bc, rho):
+        if rho == 0:
+            yield (br, bc); return
+        for dc in range(-rho, rho + 1):
+            yield (br - rho, bc + dc); yield (br + rho, bc + dc)
+        for dr in range(-rho + 1, rho):
+            yield (br + dr, bc - rho); yield (br + dr, bc + rho)
+
+    def nearest(self, pos, k=1):
+        # Up to k items ordered by (Manhattan distance, cell)
+        r, c = pos
+        s = self.cell
+        br, bc = r // s, c // s
+        max_rho = max(br, self.rows - 1 - br, bc, self.cols - 1 - bc)
+        buckets = self._buckets
+        cand, seen, rho = [], 0, 0
+        while rho <= max_rho and seen < self._n:
+            for key in self._ring(br, bc, rho):
+                b = buckets.get(key)
+                if b:
+                    seen += len(b)
+                    cand.extend((abs(p[0] - r) + abs(p[1] - c), p) for p in b)
+            if len(cand) >= k:
+                cand.sort(); del cand[k:]
+                # Anything outside rings 0..rho is at least rho * s + 1 away
+                if cand[-1][0] <= rho * s: break
+            rho += 1
+        cand.sort()
+        return [p for _, p in cand[:k]]
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import importlib
+import itertools
+import os
+import random
+import time
+from multiprocessing import Pool
+import numpy as np
+from params import parse_values
+from recorder import FrameRecorder
+
+# --- Parameter Sweeps ---
+# Runs one scenario over every combination of seeds and run() keyword values
+# on a process pool. Episodes go out in chunks (imap_unordered), and each
+# finished one is appended to a CSV file straight away, one row per episode.
+# Every episode passes its seed to run(seed=...) and also seeds the global
+# random/numpy generators, so a row never depends on which worker ran it or
+# in what order. Rows already in the file are skipped: an interrupted sweep
+# picks up where it stopped when run again with the same arguments.
+#
+#   python sweep.py warehouse4 --seeds 0:1000 --param density=0.02,0.05 \
+#       --param n_agents=3,6 --out warehouse4.csv
+
+METRICS = ['steps', 'remaining', 'moved', 'seconds']
+
+
+def parse_seeds(text):
+    # "0:1000" (a range) or "1,5,9"
+    if ':' in text:
+        lo, hi = text.split(':')
+        return list(range(int(lo), int(hi)))
+    return [int(v) for v in text.split(',')]
+
+
+def episodes(scenario, seeds, grid):
+    names = sorted(grid)
+    for values in itertools.product(*(grid[n] for n in names)):
+        for seed in seeds: yield scenario, seed, dict(zip(names, values))
+
+
+def _moved(result):
+    frames = result.get('frames')
+    if isinstance(frames, FrameRecorder): return sum(frames.travelled())
+    if 'hist' in result:
+        return sum(abs(a[0] - b[0]) + abs(a[1] - b[1])
+                   for h in result['hist'].values() for a, b in zip(h, h[1:]))
+    return ''
+
+
+def run_episode(task):
+    scenario, seed, params = task
+    random.seed(seed); np.random.seed(seed % 2 ** 32)
+    module = importlib.import_module(scenario)
+    t = time.perf_counter()
+    result = module.run(seed=seed, **params)
+    seconds = time.perf_counter() - t
+    return {'scenario': scenario, 'seed': seed, **params,
+            'steps': result['steps'], 'remaining': result.get('remaining', ''),
+            'moved': _moved(result), 'seconds': round(seconds, 6)}
+
+
+def _done(path, header):
+    # Keys of the episodes already in the file (as the strings csv wrote)
+    if not os.path.exists(path) or not os.path.getsize(path): return set()
+    with open(path, 'rb+') as f:
+        # An interrupted write can leave half a row at the end; drop it
+        data = f.read()
+        cut = data.rfind(b'\n') + 1
+        if cut < len(data): f.truncate(cut)
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        head = next(reader)
+        if head != header:
+            raise ValueError(f"{path} has columns {head}, this sweep writes {header}")
+        n = len(header) - len(METRICS)
+        return {tuple(row[:n]) for row in reader if len(row) == len(header)}
+
+
+def sweep(scenario, seeds, grid, out, workers=None, chunk=None):
+    # Returns the number of episodes run (0 if the file already had them all)
+    names = sorted(grid)
+    header = ['scenario', 'seed'] + names + METRICS
+    done = _done(out, header)
+    todo = [t for t in episodes(scenario, seeds, grid)
+            if (t[0], str(t[1]), *(str(t[2][n]) for n in names)) not in done]
+    if not todo: return 0
+    workers = workers or os.cpu_count()
+    chunk = chunk or max(1, len(todo) // (workers * 8))
+    fresh = not done and not (os.path.exists(out) and os.path.getsize(out))
+    with open(out, 'a', newline='') as f, Pool(workers) as pool:
+        writer = csv.DictWriter(f, header)
+        if fresh: writer.writeheader()
+        for row in pool.imap_unordered(run_episode, todo, chunksize=chunk):
+            writer.writerow(row)
+            f.flush()
+    return len(todo)
+
+
+def summarize(path, by=None):
+    # Mean metrics per parameter combination: {(value, ...): {metric: mean, 'n': k}}
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows: return {}
+    by = by or [c for c in rows[0] if c not in METRICS and c not in ('scenario', 'seed')]
+    groups = {}
+    for row in rows: groups.setdefault(tuple(row[c] for c in by), []).append(row)
+    out = {}
+    for key, group in sorted(groups.items()):
+        stats = {'n': len(group)}
+        for m in METRICS:
+            vals = [float(r[m]) for r in group if r[m] != '']
+            if vals: stats[m] = sum(vals) / len(vals)
+        rem = [float(r['remaining']) for r in group if r['remaining'] != '']
+        if rem: stats['solved'] = sum(v == 0 for v in rem) / len(rem)
+        out[key] = stats
+    return out
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="Run a scenario over seeds and parameter grids")
+    ap.add_argument('scenario', help="module name, e.g. warehouse4")
+    ap.add_argument('--seeds', default='0:100', help="range lo:hi or a comma list")
+    ap.add_argument('--param', action='append', default=[], metavar='NAME=V1,V2',
+                    help="run() keyword and the values to sweep (repeatable)")
+    ap.add_argument('--out', help="CSV file (default: <scenario>_sweep.csv)")
+    ap.add_argument('--workers', type=int, help="processes (default: all cores)")
+    ap.add_argument('--chunk', type=int, help="episodes per dispatch (default: auto)")
+    args = ap.parse_args()
+
+    grid = {}
+    for p in args.param:
+        name, values = p.split('=', 1)
+        grid[name] = parse_values(values)
+    out = args.out or f"{args.scenario}_sweep.csv"
+    t = time.perf_counter()
+    n = sweep(args.scenario, parse_seeds(args.seeds), grid, out, args.workers, args.chunk)
+    print(f"{n} episodes in {time.perf_counter() - t:.1f}s -> {out}")
+    names = sorted(grid)
+    for key, stats in summarize(out, names).items():
+        label = ', '.join(f"{k}={v}" for k, v in zip(names, key)) or args.scenario
+        cols = '  '.join(f"{m}={stats[m]:.3g}" for m in METRICS + ['solved'] if m in stats)
+        print(f"{label}: n={stats['n']}  {cols}")
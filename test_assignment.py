@@ -0,0 +1,75 @@
+import random
+from itertools import permutations
+import numpy as np
+from assignment import assign, cost_matrix, greedy, hungarian
+from fields import INF
+from pathfinding import GridMap
+from world import make_grid
+
+
+def _astar_cost(gmap, agents, tasks):
+    cost = np.full((len(agents), len(tasks)), INF, dtype=np.int64)
+    for i, a in enumerate(agents):
+        for j, t in enumerate(tasks):
+            path = gmap.astar(a, t)
+            if path is not None: cost[i, j] = len(path) - 1
+    return cost
+
+
+def _brute(cost):
+    # Cheapest total over every way to match all of the smaller side
+    n, m = cost.shape
+    if n <= m: return min(sum(cost[i, p[i]] for i in range(n)) for p in permutations(range(m), n))
+    return min(sum(cost[p[j], j] for j in range(m)) for p in permutations(range(n), m))
+
+
+def test_cost_matrix_matches_astar():
+    rng = random.Random(5)
+    for trial in range(20):
+        grid = make_grid(rng, 12, 12, 0.3)
+        gmap = GridMap(grid)
+        cells = [(r, c) for r in range(12) for c in range(12)]
+        # Blocked cells on both sides: agents spawned on walls, tasks on walls
+        agents = rng.sample(cells, rng.randint(1, 6))
+        tasks = rng.sample(cells, rng.randint(1, 6)) + agents[:1]
+        expected = _astar_cost(gmap, agents, tasks)
+        assert (cost_matrix(gmap, agents, tasks) == expected).all()
+        assert (cost_matrix(gmap, tasks, agents) == _astar_cost(gmap, tasks, agents)).all()
+
+
+def test_agent_on_a_wall_gets_a_task():
+    grid = np.zeros((5, 5), dtype=int)
+    grid[2, 2] = 1
+    gmap = GridMap(grid)
+    cost = cost_matrix(gmap, [(2, 2)], [(0, 0), (4, 4)])
+    assert cost.tolist() == [[4, 4]]
+    assert len(assign(cost)) == 1
+
+
+def test_hungarian_is_optimal():
+    rng = np.random.default_rng(3)
+    for n, m in [(1, 1), (2, 3), (3, 3), (4, 6), (5, 5), (6, 4)]:
+        for _ in range(10):
+            cost = rng.integers(0, 50, size=(n, m)).astype(float)
+            if n <= m: col = hungarian(cost)
+            else:
+                row = hungarian(cost.T)
+                col = np.full(n, -1)
+                col[row] = np.arange(m)
+            pairs = [(i, j) for i, j in enumerate(col) if j >= 0]
+            assert len(pairs) == min(n, m) and len({j for _, j in pairs}) == len(pairs)
+            assert sum(cost[i, j] for i, j in pairs) == _brute(cost)
+
+
+def test_assign_skips_unreachable_pairs():
+    cost = np.array([[INF, 3], [INF, 1], [INF, INF]])
+    pairs = assign(cost)
+    assert pairs == [(1, 1)]
+    # Greedy fallback: a valid matching, no pair used twice
+    rng = np.random.default_rng(0)
+    cost = rng.integers(0, 100, size=(30, 20))
+    pairs = assign(cost, max_exact=10)
+    assert len(pairs) == 20
+    assert len({i for i, _ in pairs}) == 20 and len({j for _, j in pairs}) == 20
+    col = greedy(cost.astype(float))
+    assert sorted(j for j in col if j >= 0) == list(range(20))
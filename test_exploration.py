@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import map10
+from exploration import FREE, OCCUPIED, UNKNOWN, OccupancyMap, frontier_clusters, reachable
+from pathfinding import GridMap
+
+
+def test_wall_hides_cells_behind_it():
+    grid = np.zeros((7, 7), dtype=int)
+    grid[3, 4] = 1
+    occ = OccupancyMap(grid, radius=3)
+    occ.reveal((3, 3))
+    assert occ.known[3, 4] == OCCUPIED
+    assert occ.known[3, 5] == UNKNOWN and occ.known[3, 6] == UNKNOWN
+    assert occ.known[3, 2] == FREE and occ.known[3, 0] == FREE
+    assert occ.known[0, 3] == FREE and occ.known[6, 3] == FREE
+
+
+def test_sensor_on_a_wall_still_sees():
+    grid = np.zeros((5, 5), dtype=int)
+    grid[2, 2] = 1
+    occ = OccupancyMap(grid, radius=2)
+    new = occ.reveal((2, 2))
+    assert occ.known[2, 2] == OCCUPIED
+    assert len(new) == 13  # the whole disc
+    assert occ.known[0, 2] == FREE and occ.known[2, 4] == FREE
+
+
+def test_frontier_clusters_are_8_connected():
+    W = 10
+    cells = {0, 11, 22, 5, 6, 99}
+    groups = sorted(sorted(g) for g in frontier_clusters(cells, W))
+    assert groups == [[0, 11, 22], [5, 6], [99]]
+    # No wrap-around between the end of one row and the start of the next
+    assert len(frontier_clusters({9, 10}, W)) == 2
+
+
+def test_reachable_from_a_wall():
+    grid = np.array([[1, 0, 1, 0],
+                     [0, 1, 1, 1],
+                     [1, 0, 1, 0]])
+    reach = reachable(GridMap(grid), [(1, 1)]).reshape(3, 4)
+    assert np.argwhere(reach).tolist() == [[0, 1], [1, 0], [1, 1], [2, 1]]
+
+
+def test_map10_stops_when_nothing_is_left_to_reach():
+    # Dense maps leave frontier cells seen through diagonal gaps; seed 8 spawns on walls
+    for seed in range(10):
+        result = map10.run(seed=seed, H=30, W=30, density=0.25, max_steps=2000)
+        assert result['steps'] < 500
+    result = map10.run(seed=8, H=30, W=30, density=0.25, max_steps=2000)
+    assert result['remaining'] < 50
+
+
+def test_map10_needs_a_sensor():
+    with pytest.raises(ValueError): map10.run(sensor=0)
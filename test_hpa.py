@@ -0,0 +1,56 @@
+import random
+import numpy as np
+from hpa import HierarchicalPlanner
+from pathfinding import GridMap
+from world import make_grid
+
+
+def _check_route(gmap, path, start, goal):
+    cells = list(path)
+    assert cells[0] == start and cells[-1] == goal
+    for (r0, c0), (r1, c1) in zip(cells, cells[1:]):
+        assert abs(r0 - r1) + abs(c0 - c1) == 1 and gmap.grid[r1, c1] == 0
+
+
+def test_same_reachability_as_astar_and_near_shortest():
+    rng = random.Random(9)
+    extra = []
+    for trial in range(12):
+        size = rng.choice([24, 40, 50])
+        gmap = GridMap(make_grid(rng, size, size, rng.choice([0.1, 0.25, 0.35])))
+        hpa = HierarchicalPlanner(gmap, cluster=rng.choice([4, 8]))
+        blocked = [tuple(p) for p in np.argwhere(gmap.grid == 1).tolist()]
+        for _ in range(60):
+            goal = (rng.randrange(size), rng.randrange(size))
+            # A third of the starts are on walls
+            start = rng.choice(blocked) if blocked and rng.random() < 0.33 else (rng.randrange(size), rng.randrange(size))
+            flat, path = gmap.astar(start, goal), hpa.astar(start, goal)
+            assert (flat is None) == (path is None), (start, goal)
+            if path is None: continue
+            _check_route(gmap, path, start, goal)
+            assert len(path) >= len(flat)
+            extra.append(len(path) / len(flat))
+    assert np.mean(extra) < 1.1
+
+
+def test_blocked_start_next_to_a_border():
+    # The start's only way out crosses into the next cluster
+    grid = np.zeros((8, 8), dtype=int)
+    grid[:, 3] = 1
+    grid[0:3, 0:3] = 1
+    gmap = GridMap(grid)
+    hpa = HierarchicalPlanner(gmap, cluster=4)
+    path = hpa.astar((1, 3), (7, 7))
+    assert path is not None and len(path) == len(gmap.astar((1, 3), (7, 7)))
+
+
+def test_routes_follow_grid_changes():
+    rng = random.Random(2)
+    gmap = GridMap(make_grid(rng, 32, 32, 0.2))
+    hpa = HierarchicalPlanner(gmap, cluster=8)
+    for _ in range(40):
+        gmap.set_cell((rng.randrange(32), rng.randrange(32)), rng.random() < 0.6)
+        start, goal = (rng.randrange(32), rng.randrange(32)), (rng.randrange(32), rng.randrange(32))
+        flat, path = gmap.astar(start, goal), hpa.astar(start, goal)
+        assert (flat is None) == (path is None)
+        if path is not None: _check_route(gmap, path, start, goal)
@@ -0,0 +1,38 @@
+import numpy as np
+from fields import DistanceField
+from mapf import CBS, ReservationTable, _avoid_table, plan_prioritized, st_astar, st_focal
+from pathfinding import GridMap
+
+
+def _checked(gmap, starts, goals, paths):
+    T = max(len(p) for p in paths)
+    at = [[p.cells[min(t, len(p) - 1)] for p in paths] for t in range(T)]
+    for p, s, g in zip(paths, starts, goals):
+        cells = list(p)
+        assert cells[0] == s and cells[-1] == g
+        for (r0, c0), (r1, c1) in zip(cells, cells[1:]):
+            assert abs(r0 - r1) + abs(c0 - c1) <= 1 and gmap.grid[r1, c1] == 0
+    for t in range(T):
+        assert len(set(at[t])) == len(at[t])
+        if t: assert not any(at[t][a] == at[t - 1][b] and at[t][b] == at[t - 1][a]
+                             for a in range(len(paths)) for b in range(a))
+
+
+def test_wall_spawns_step_off_their_start():
+    grid = np.zeros((6, 6), dtype=int)
+    grid[2, 1:5] = 1
+    gmap = GridMap(grid)
+    starts, goals = [(2, 2), (0, 0), (2, 4)], [(5, 5), (5, 0), (0, 5)]
+    best = len(gmap.astar(starts[0], goals[0]))
+    path = st_astar(gmap, starts[0], goals[0], ReservationTable())
+    assert list(path)[0] == (2, 2) and len(path) == best
+    h = DistanceField(gmap, [goals[0]]).dist
+    path = st_focal(gmap, starts[0], goals[0], ReservationTable(), h, _avoid_table([], 0), best)
+    assert list(path)[0] == (2, 2) and len(path) == best
+    _checked(gmap, starts, goals, plan_prioritized(gmap, starts, goals))
+    paths = CBS(gmap, starts, goals).solve()
+    assert None not in paths
+    _checked(gmap, starts, goals, paths)
+    # Walled in on all sides: still no route
+    grid[1:4, 0] = 1; grid[1, 1] = grid[3, 1] = 1
+    assert st_astar(GridMap(grid), (2, 0), (5, 5), ReservationTable()) is None
@@ -0,0 +1,59 @@
+import random
+import numpy as np
+from assignment import cost_matrix
+from pathcache import PathCache
+from pathfinding import GridMap
+from planpool import PlanPool
+from world import make_grid
+
+
+def _cells(path):
+    return None if path is None else list(path)
+
+
+def _setup(seed=1, size=40):
+    rng = random.Random(seed)
+    gmap = GridMap(make_grid(rng, size, size, 0.25))
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    # Every fourth query starts on whatever cell comes up, walls included
+    free = [p for p in cells if gmap.grid[p] == 0]
+    queries = [(rng.choice(cells if k % 4 == 0 else free), rng.choice(free)) for k in range(80)]
+    agents, tasks = rng.sample(cells, 30), rng.sample(free, 20)
+    return rng, gmap, free, queries, agents, tasks
+
+
+def test_pool_matches_serial_for_any_worker_count():
+    rng, gmap, free, queries, agents, tasks = _setup()
+    for workers in (1, 2, 3):
+        with PlanPool(gmap, workers, method='jps', min_batch=1) as planner:
+            for _ in range(2):
+                routes = [_cells(gmap.jps(s, g)) for s, g in queries]
+                assert [_cells(p) for p in planner.paths(queries)] == routes
+                assert (planner.cost_matrix(agents, tasks) == cost_matrix(gmap, agents, tasks)).all()
+                assert (planner.cost_matrix(tasks, agents) == cost_matrix(gmap, tasks, agents)).all()
+                # Workers must pick up grid changes between batches
+                for _ in range(25): gmap.set_cell(rng.choice(free), rng.random() < 0.7)
+
+
+def test_cache_batch_matches_one_at_a_time():
+    rng, gmap, free, _, _, _ = _setup(seed=4)
+    near = free[:40]
+    queries = [(rng.choice(near), rng.choice(near)) for _ in range(150)]
+    queries += [(g, s) for s, g in queries[:30]]
+    serial = PathCache(gmap, method='jps')
+    expected = [_cells(serial.astar(s, g)) for s, g in queries]
+    with PlanPool(gmap, 2, method='jps', min_batch=1) as planner:
+        for pool in (None, planner):
+            cache = PathCache(gmap, method='jps')
+            assert [_cells(p) for p in cache.many(queries, pool)] == expected
+            assert (cache.hits, cache.misses) == (serial.hits, serial.misses)
+
+
+def test_scenarios_do_not_depend_on_workers():
+    import resource8, warehouse4
+    for module, extra in ((warehouse4, {'n_items': 60}), (resource8, {'n_resources': 60})):
+        runs = [module.run(seed=2, H=40, W=40, n_agents=24, workers=w, **extra) for w in (1, 2)]
+        a, b = (r['frames'] for r in runs)
+        assert len(a) == len(b)
+        assert all(a.positions(i) == b.positions(i) for i in range(len(a)))
+        assert np.array_equal(a.travelled(), b.travelled())
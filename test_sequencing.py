@@ -0,0 +1,74 @@
+import random
+import numpy as np
+import sequencing
+from pathfinding import GridMap
+from sequencing import TourPlanner, nearest_neighbour, or_opt, two_opt
+from world import make_grid
+
+
+def _world(seed, size=24, n_goals=25):
+    rng = random.Random(seed)
+    gmap = GridMap(make_grid(rng, size, size, 0.2))
+    free = [tuple(p) for p in np.argwhere(gmap.grid == 0).tolist()]
+    return gmap, free[:3], rng.sample(free, n_goals)
+
+
+def _tour_length(D, order):
+    return sum(D[a, b] for a, b in zip(order, order[1:]))
+
+
+def test_tours_visit_every_reachable_goal_once():
+    for seed in range(5):
+        gmap, starts, goals = _world(seed)
+        planner = TourPlanner(gmap)
+        reachable = {g for g in goals if any(planner.field(g).distance(s) is not None for s in starts)}
+        plans = planner.plan(starts, goals)
+        visited = [g for stops, _ in plans for g in stops]
+        assert sorted(visited) == sorted(reachable)
+        for s, (stops, path) in zip(starts, plans):
+            cells = list(path)
+            assert cells[0] == s
+            # One free 4-neighbour step at a time, through the stops in order
+            for (r0, c0), (r1, c1) in zip(cells, cells[1:]):
+                assert abs(r0 - r1) + abs(c0 - c1) == 1 and gmap.grid[r1, c1] == 0
+            k = 0
+            for p in cells:
+                if k < len(stops) and p == stops[k]: k += 1
+            assert k == len(stops)
+
+
+def test_local_search_never_lengthens_the_tour():
+    gmap, starts, goals = _world(7, n_goals=30)
+    planner = TourPlanner(gmap)
+    goals = [g for g in goals if planner.field(g).distance(starts[0]) is not None]
+    D = planner.matrix([starts[0]] + goals)
+    start = nearest_neighbour(D)
+    better = or_opt(D, two_opt(D, start))
+    assert sorted(better) == list(range(len(D))) and better[0] == 0
+    assert _tour_length(D, better) <= _tour_length(D, start)
+
+
+def test_tours_do_not_depend_on_the_clock(monkeypatch):
+    gmap, starts, goals = _world(3, n_goals=40)
+    first = TourPlanner(gmap).order(starts[0], goals)
+    # A clock that races ahead would have cut a time budget short
+    clock = iter(range(0, 10 ** 9, 1000))
+    monkeypatch.setattr(sequencing.time, 'perf_counter', lambda: next(clock))
+    assert TourPlanner(gmap).order(starts[0], goals) == first
+
+
+def test_wall_spawns_get_goals():
+    gmap, _, goals = _world(2)
+    walls = [tuple(p) for p in np.argwhere(gmap.grid == 1).tolist()]
+    starts = [p for p in walls if any(gmap.astar(p, g) for g in goals)][:3]
+    planner = TourPlanner(gmap)
+    reachable = {g for g in goals if any(gmap.astar(s, g) for s in starts)}
+    plans = planner.plan(starts, goals)
+    assert sorted(g for stops, _ in plans for g in stops) == sorted(reachable)
+    for s, (stops, path) in zip(starts, plans):
+        cells = list(path)
+        assert cells[0] == s and stops
+        for (r0, c0), (r1, c1) in zip(cells, cells[1:]):
+            assert abs(r0 - r1) + abs(c0 - c1) == 1 and gmap.grid[r1, c1] == 0
+    order = planner.order(starts[0], goals)
+    assert sorted(order) == sorted(g for g in goals if gmap.astar(starts[0], g))
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from server import SimServer, World
+
+
+def _world():
+    grid = np.zeros((6, 6), dtype=int)
+    grid[2, 2] = 1
+    return World(grid, [(0, 0), (5, 5)])
+
+
+async def _talk(lines):
+    # Sends each line on one connection and returns the replies in order
+    sim = SimServer(_world())
+    server = await asyncio.start_server(sim.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        replies = []
+        for line in lines:
+            writer.write(line.encode() + b'\n')
+            await writer.drain()
+            replies.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        await writer.wait_closed()
+    return replies
+
+
+def test_bad_messages_get_an_error_and_keep_the_connection():
+    bad = [
+        'not json',
+        '[]',
+        '3',
+        '"task"',
+        'null',
+        '{"op": "dance"}',
+        '{"op": "task"}',
+        '{"op": "task", "cell": [1]}',
+        '{"op": "task", "cell": [1, 2, 3]}',
+        '{"op": "task", "cell": 7}',
+        '{"op": "task", "cell": "ab"}',
+        '{"op": "task", "cell": [1.5, 2]}',
+        '{"op": "task", "cell": [true, 2]}',
+        '{"op": "task", "cell": [9, 0]}',
+        '{"op": "task", "cell": [-1, 0]}',
+        '{"op": "task", "cell": [2, 2]}',
+        '{"op": "obstacle", "cell": [0]}',
+        '{"op": "obstacle", "cell": null}',
+    ]
+    replies = asyncio.run(_talk(bad + ['{"op": "task", "cell": [3, 4]}', '{"op": "snapshot"}']))
+    for line, reply in zip(bad, replies):
+        assert reply['type'] == 'error', line
+    assert replies[-2] == {'type': 'ack', 'op': 'task', 'ok': True}
+    assert replies[-1]['type'] == 'snapshot' and replies[-1]['tasks'] == [[3, 4]]
+
+
+def test_obstacle_cuts_routes_and_reopens_tasks():
+    world = _world()
+    world.add_task((0, 5))
+    idle, tasks = world.jobs()
+    assigned = world.apply(world.plan(idle, tasks))
+    assert assigned and not world.open
+    stopped = world.set_obstacle((0, 3), True)
+    assert stopped == [assigned[0][0]]
+    assert world.open == {5}
+
+
+def test_task_cells_cannot_be_blocked():
+    world = _world()
+    world.add_task((0, 5))
+    with pytest.raises(ValueError): world.set_obstacle((0, 5), True)
+    idle, tasks = world.jobs()
+    (agent, _, _), = world.apply(world.plan(idle, tasks))
+    # Taken but not done: blocking it would strand the task behind a wall
+    with pytest.raises(ValueError): world.set_obstacle((0, 5), True)
+    assert world.pop.task[agent] == 5 and not world.gmap.grid[0, 5]
+    assert world.set_obstacle((1, 5), True) in ([], [agent])
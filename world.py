@@ -0,0 +1,20 @@
+import numpy as np
+
+# --- World Generation ---
+# Shared by the scenario scripts. `rng` is a random.Random so every episode
+# is reproducible from its seed without touching the global random state.
+
+def make_grid(rng, H, W, density):
+    # Same draw order as the original per-cell loops (row-major, one draw per cell)
+    draws = np.fromiter((rng.random() for _ in range(H * W)), dtype=float, count=H * W)
+    return (draws.reshape(H, W) < density).astype(int)
+
+
+def spawn(rng, grid, n, preferred):
+    # Use the scenario's fixed start cells first, then random free cells
+    starts = list(preferred[:n])
+    H, W = grid.shape
+    while len(starts) < n:
+        p = (rng.randrange(H), rng.randrange(W))
+        if grid[p] == 0 and p not in starts: starts.append(p)
+    return starts